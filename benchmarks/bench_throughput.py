@@ -0,0 +1,156 @@
+"""
+End-to-end throughput benchmark for `LetterDownloader`.
+
+Starts the local mock server, drives the real `BrowserEngine` and
+`LetterDownloader` against it with a throwaway profile and output directory,
+and reports letters/sec, peak RSS of the whole process tree (Python +
+Chromium) and p50/p99 per-letter latency.
+
+    python benchmarks/bench_throughput.py --penpals 3 --letters 50 --latency-ms 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.dirname(__file__))
+
+from mock_slowly import MockDataset, MockSlowlyServer
+from sld.core.browser import BrowserEngine
+from sld.core.downloader import LetterDownloader
+from sld.core.metrics import metrics
+from sld.core.procinfo import process_tree_rss
+from sld.core.tracing import tracer
+
+
+class RssSampler(threading.Thread):
+    """Samples process-tree RSS in the background and keeps the peak."""
+
+    def __init__(self, interval: float = 0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        if not os.path.isdir("/proc"):
+            return
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, process_tree_rss(os.getpid()))
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        if not self.peak:
+            # No /proc (macOS/Windows): fall back to this process only
+            import resource
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak = maxrss if sys.platform == "darwin" else maxrss * 1024
+        return self.peak
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+async def run_benchmark(server: MockSlowlyServer, headless: bool = True,
+                        recycle_letters: Optional[int] = None) -> Dict:
+    workdir = Path(tempfile.mkdtemp(prefix="sld-bench-"))
+    engine = BrowserEngine(profile_path=workdir / "profile", base_url=server.base_url)
+    if recycle_letters is not None:
+        engine.recycle_letters = recycle_letters
+    downloader = LetterDownloader(engine, download_path=workdir / "out")
+
+    latencies: List[float] = []
+    last_event = [0.0]
+
+    def on_progress(msg: str):
+        now = time.perf_counter()
+        if msg.startswith("Downloaded"):
+            latencies.append(now - last_event[0])
+        last_event[0] = now
+
+    sampler = RssSampler()
+    sampler.start()
+    await engine.start(headless=headless)
+    try:
+        penpals = await downloader.get_penpals()
+        started = time.perf_counter()
+        for name in penpals:
+            # The first letter of each penpal includes navigation and scrolling
+            last_event[0] = time.perf_counter()
+            await downloader.process_penpal(name, progress_callback=on_progress)
+        await downloader.retry_failed()
+        elapsed = time.perf_counter() - started
+    finally:
+        await engine.close()
+        peak_rss = sampler.stop()
+
+    return {
+        "penpals": len(penpals),
+        "letters": len(latencies),
+        "expected_letters": server.dataset.total_letters,
+        "seconds": round(elapsed, 3),
+        "letters_per_sec": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        # Latency drift over a long run: compare the first and last tenth of the letters
+        "p50_first_10pct_ms": round(percentile(latencies[:max(1, len(latencies) // 10)], 50) * 1000, 1),
+        "p50_last_10pct_ms": round(percentile(latencies[-max(1, len(latencies) // 10):], 50) * 1000, 1),
+        "recycles": int(metrics.recycles.value),
+        "http_requests": server.requests,
+        "output_dir": str(workdir / "out"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LetterDownloader throughput benchmark")
+    parser.add_argument("--penpals", type=int, default=3)
+    parser.add_argument("--letters", type=int, default=30, help="Letters per penpal")
+    parser.add_argument("--photos", type=int, default=0, help="Max photos per letter")
+    parser.add_argument("--page-size", type=int, default=24)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--headed", action="store_true", help="Show the browser window")
+    parser.add_argument("--json", type=Path, help="Also write the report to this file")
+    parser.add_argument("--trace", type=Path, help="Write a Chrome trace-event file of the run")
+    parser.add_argument("--recycle-letters", type=int, help="Recycle the page every N letters (0 = never)")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracer.enable()
+
+    dataset = MockDataset(args.penpals, args.letters, args.photos, args.page_size, args.seed)
+    server = MockSlowlyServer(dataset, args.latency_ms).start()
+    try:
+        report = asyncio.run(run_benchmark(server, headless=not args.headed, recycle_letters=args.recycle_letters))
+    finally:
+        server.stop()
+
+    if args.trace:
+        tracer.disable()
+        report["trace"] = str(tracer.export(args.trace))
+
+    width = max(len(k) for k in report)
+    for key, value in report.items():
+        print(f"{key.ljust(width)}  {value}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=4), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
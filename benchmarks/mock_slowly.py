@@ -0,0 +1,343 @@
+"""
+Local stand-in for the Slowly web app.
+
+Serves just enough of the DOM contract that `LetterDownloader` relies on:
+- `.side-bar a[href^='/friend/']` entries with an `h6` name
+- `.col-6.col-xl-4.mb-3` letter cards with infinite scroll
+- `.media-body.mx-3.mt-2` signature block (name + date lines)
+- `a.flip.active` back button
+
+Penpals, letters and photos are generated deterministically from a seed, and
+every request can be slowed down with injected latency.
+
+Run standalone:
+    python benchmarks/mock_slowly.py --penpals 5 --letters 40 --latency-ms 50
+"""
+import argparse
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+def _png(width: int, height: int, rgb: Tuple[int, int, int]) -> bytes:
+    """Builds a solid-colour PNG without any imaging dependency."""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(rgb) * width
+    raw = zlib.compress(row * height, 9)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", raw) + chunk(b"IEND", b"")
+
+
+class MockDataset:
+    """Deterministic penpals/letters generated from a seed."""
+
+    def __init__(self, penpals: int = 5, letters: int = 20, photos: int = 0,
+                 page_size: int = 24, seed: int = 1):
+        self.page_size = page_size
+        rng = random.Random(seed)
+        self.penpals: List[Dict] = []
+        start = date(2019, 1, 1)
+
+        for pid in range(1, penpals + 1):
+            entries = []
+            for n in range(letters):
+                day = start + timedelta(days=rng.randint(0, 1800))
+                entries.append({
+                    "index": n,
+                    "date": day.strftime("%b %d, %Y"),
+                    "preview": f"Letter {letters - n} from penpal {pid}",
+                    "stamp": rng.randint(1, 8),
+                    # Photo ids are drawn from a small pool so some are shared between letters
+                    "photos": [rng.randint(1, max(photos * 4, 1)) for _ in range(rng.randint(0, photos))],
+                    "body": " ".join(rng.choice(_WORDS) for _ in range(rng.randint(80, 400))),
+                })
+            self.penpals.append({
+                "id": pid,
+                "name": f"Penpal {pid:03d}",
+                "activity": f"active {rng.randint(1, 48)}h ago",
+                "letters": entries,
+            })
+
+    @property
+    def total_letters(self) -> int:
+        return sum(len(p["letters"]) for p in self.penpals)
+
+    def penpal(self, pid: int) -> Optional[Dict]:
+        if 1 <= pid <= len(self.penpals):
+            return self.penpals[pid - 1]
+        return None
+
+
+_WORDS = (
+    "dear friend hope this letter finds you well the weather here has been "
+    "lovely and I have been reading a lot lately tell me about your city "
+    "and your favourite food stamps tea rain morning walk music"
+).split()
+
+
+_STYLE = """
+body { font-family: sans-serif; margin: 0; display: flex; }
+.side-bar { width: 220px; position: fixed; top: 0; bottom: 0; overflow-y: auto; background: #f3f3f3; }
+.side-bar a { display: flex; align-items: center; padding: 6px; color: inherit; text-decoration: none; }
+.side-bar img { width: 32px; height: 32px; border-radius: 50%; margin-right: 6px; }
+.side-bar h6 { margin: 0; font-size: 14px; }
+main { margin-left: 230px; flex: 1; }
+.row { display: flex; flex-wrap: wrap; }
+.col-6 { width: 30%; height: 220px; box-sizing: border-box; padding: 8px; cursor: pointer; }
+.letter { padding: 24px; background: url(/assets/paper.png); }
+.letter img.photo { width: 320px; display: block; margin: 8px 0; }
+"""
+
+_SCRIPT = """
+const PAGE = %(page_size)d;
+let loaded = document.querySelectorAll('.col-6.col-xl-4.mb-3').length;
+let loading = false;
+const total = %(total)d;
+const pid = %(pid)d;
+
+function cardHtml(l) {
+  return `<div class="col-6 col-xl-4 mb-3" data-index="${l.index}">
+    <div class="card"><small class="date">${l.date}</small><p>${l.preview}</p></div></div>`;
+}
+
+async function loadMore() {
+  if (loading || loaded >= total) return;
+  loading = true;
+  const r = await fetch(`/api/friend/${pid}/letters?offset=${loaded}&limit=${PAGE}`);
+  const items = await r.json();
+  document.querySelector('.row').insertAdjacentHTML('beforeend', items.map(cardHtml).join(''));
+  loaded += items.length;
+  loading = false;
+}
+
+window.addEventListener('scroll', () => {
+  if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 50) loadMore();
+});
+
+document.querySelector('.row').addEventListener('click', (e) => {
+  const card = e.target.closest('.col-6.col-xl-4.mb-3');
+  if (!card) return;
+  const idx = card.dataset.index;
+  history.pushState({letter: idx}, '', `/friend/${pid}/letter/${idx}`);
+  openLetter(idx);
+});
+
+async function openLetter(idx) {
+  document.getElementById('list').style.display = 'none';
+  const view = document.getElementById('letter');
+  view.innerHTML = '';
+  view.style.display = 'block';
+  const r = await fetch(`/api/friend/${pid}/letter/${idx}`);
+  view.innerHTML = await r.text();
+  view.querySelector('a.flip.active').addEventListener('click', (e) => {
+    e.preventDefault();
+    history.back();
+  });
+}
+
+window.addEventListener('popstate', (e) => {
+  if (e.state && e.state.letter !== undefined) {
+    openLetter(e.state.letter);
+  } else {
+    document.getElementById('letter').style.display = 'none';
+    document.getElementById('list').style.display = 'block';
+  }
+});
+"""
+
+
+class MockSlowlyHandler(BaseHTTPRequestHandler):
+    server: "MockSlowlyServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        self.server.count_request()
+
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+
+        try:
+            if not parts or parts == ["home"]:
+                return self._html(self._page("<h4>Home</h4>"))
+            if parts[0] == "friend" and len(parts) >= 2:
+                # /friend/<id> and /friend/<id>/letter/<n> both boot the SPA shell
+                return self._friend_page(int(parts[1]))
+            if parts[:2] == ["api", "friend"] and len(parts) >= 4:
+                pid = int(parts[2])
+                if parts[3] == "letters":
+                    query = parse_qs(url.query)
+                    offset = int(query.get("offset", ["0"])[0])
+                    limit = int(query.get("limit", [str(self.server.dataset.page_size)])[0])
+                    return self._letters_json(pid, offset, limit)
+                if parts[3] == "letter" and len(parts) == 5:
+                    return self._letter_html(pid, int(parts[4]))
+            if parts[0] == "assets":
+                return self._asset(parts[1:])
+        except (ValueError, IndexError):
+            pass
+
+        self.send_error(404)
+
+    # --- Pages ---
+
+    def _sidebar(self) -> str:
+        items = []
+        for p in self.server.dataset.penpals:
+            items.append(
+                f'<a href="/friend/{p["id"]}"><img src="/assets/avatar/{p["id"]}.png">'
+                f'<div><h6>{escape(p["name"])}</h6><small class="activity">{p["activity"]}</small></div></a>'
+            )
+        return f'<div class="side-bar">{"".join(items)}</div>'
+
+    def _page(self, main: str, script: str = "") -> str:
+        return (
+            f"<!doctype html><html><head><meta charset='utf-8'><style>{_STYLE}</style></head>"
+            f"<body>{self._sidebar()}<main>{main}</main>"
+            f"{f'<script>{script}</script>' if script else ''}</body></html>"
+        )
+
+    def _card(self, letter: Dict) -> str:
+        return (
+            f'<div class="col-6 col-xl-4 mb-3" data-index="{letter["index"]}">'
+            f'<div class="card"><small class="date">{letter["date"]}</small>'
+            f'<p>{escape(letter["preview"])}</p></div></div>'
+        )
+
+    def _friend_page(self, pid: int):
+        penpal = self.server.dataset.penpal(pid)
+        if not penpal:
+            return self.send_error(404)
+
+        page_size = self.server.dataset.page_size
+        cards = "".join(self._card(l) for l in penpal["letters"][:page_size])
+        script = _SCRIPT % {"page_size": page_size, "total": len(penpal["letters"]), "pid": pid}
+        main = f'<div id="list"><div class="row">{cards}</div></div><div id="letter" style="display:none"></div>'
+        self._html(self._page(main, script))
+
+    def _letters_json(self, pid: int, offset: int, limit: int):
+        penpal = self.server.dataset.penpal(pid)
+        if not penpal:
+            return self.send_error(404)
+
+        items = [
+            {k: l[k] for k in ("index", "date", "preview")}
+            for l in penpal["letters"][offset:offset + limit]
+        ]
+        self._send(200, "application/json", json.dumps(items).encode())
+
+    def _letter_html(self, pid: int, index: int):
+        penpal = self.server.dataset.penpal(pid)
+        if not penpal or not 0 <= index < len(penpal["letters"]):
+            return self.send_error(404)
+
+        letter = penpal["letters"][index]
+        photos = ""
+        if letter["photos"]:
+            slides = "".join(
+                f'<div class="slick-slide"><img class="photo" src="/assets/photo/{ph}.png"></div>'
+                for ph in letter["photos"]
+            )
+            photos = f'<div class="slick-slider">{slides}</div>'
+
+        html = (
+            '<a class="flip active" href="#">Back</a>'
+            '<div class="letter">'
+            f'<div class="media"><img src="/assets/avatar/{pid}.png">'
+            f'<div class="media-body mx-3 mt-2"><h6>{escape(penpal["name"])}</h6>'
+            f'<div>{letter["date"]}</div></div>'
+            f'<img class="stamp" src="/assets/stamp/{letter["stamp"]}.png"></div>'
+            f'<p>{escape(letter["body"])}</p>{photos}</div>'
+        )
+        self._html(html)
+
+    def _asset(self, parts: List[str]):
+        kind = parts[0]
+        key = parts[-1].rsplit(".", 1)[0]
+        seed = zlib.crc32(f"{kind}/{key}".encode())
+        rgb = (seed & 0xFF, (seed >> 8) & 0xFF, (seed >> 16) & 0xFF)
+        size = {"photo": (1200, 900), "paper": (64, 64), "stamp": (120, 150)}.get(kind, (64, 64))
+        self._send(200, "image/png", _png(size[0], size[1], rgb),
+                   {"Cache-Control": "public, max-age=31536000, immutable"})
+
+    # --- Plumbing ---
+
+    def _html(self, html: str):
+        self._send(200, "text/html; charset=utf-8", html.encode("utf-8"))
+
+    def _send(self, status: int, content_type: str, body: bytes, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockSlowlyServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the dataset and injected latency."""
+    daemon_threads = True
+
+    def __init__(self, dataset: MockDataset, latency_ms: float = 0, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), MockSlowlyHandler)
+        self.dataset = dataset
+        self.latency = latency_ms / 1000.0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def start(self) -> "MockSlowlyServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Slowly stand-in server")
+    parser.add_argument("--penpals", type=int, default=5)
+    parser.add_argument("--letters", type=int, default=20, help="Letters per penpal")
+    parser.add_argument("--photos", type=int, default=0, help="Max photos per letter")
+    parser.add_argument("--page-size", type=int, default=24, help="Cards per infinite-scroll page")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    dataset = MockDataset(args.penpals, args.letters, args.photos, args.page_size, args.seed)
+    server = MockSlowlyServer(dataset, args.latency_ms, port=args.port)
+    print(f"Mock Slowly serving {dataset.total_letters} letters at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
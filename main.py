@@ -1,15 +1,22 @@
 import sys
 import os
+import multiprocessing
 
 # Ensure src is in path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from sld.gui.app import App
-
 def main():
+    if len(sys.argv) > 1:
+        # Command-line mode (e.g. `main.py optimize`)
+        from sld.cli import main as cli_main
+        sys.exit(cli_main())
+
+    from sld.gui.app import App
     app = App()
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
     app.mainloop()
 
 if __name__ == "__main__":
+    # Required for worker processes in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main()
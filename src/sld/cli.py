@@ -0,0 +1,244 @@
+import argparse
+import functools
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from .config import config
+
+
+def _format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def _with_run_lock(command):
+    """Runs a command under the run lock, so it never rewrites files a backup, sync or the GUI is using."""
+    @functools.wraps(command)
+    def wrapper(args) -> int:
+        from .core.scheduler import RunLock
+
+        lock = RunLock.default()
+        if not lock.acquire():
+            print("Another sync or backup is running.")
+            return 1
+        try:
+            return command(args)
+        finally:
+            lock.release()
+    return wrapper
+
+
+@_with_run_lock
+def cmd_optimize(args) -> int:
+    from .core.pdf_optimize import find_pdfs, optimize_tree
+
+    root = Path(args.path) if args.path else config.download_path
+    report = optimize_tree(
+        find_pdfs(root),
+        dpi=args.dpi or config.get("optimize_dpi"),
+        quality=args.quality or config.get("optimize_quality"),
+        workers=args.workers,
+        progress_callback=lambda done, total: print(f"\r{done}/{total}", end="", flush=True),
+    )
+    print()
+    print(
+        f"Optimized {report['optimized']} of {report['files']} PDFs "
+        f"({report['failed']} failed), saved {_format_bytes(report['bytes_saved'])}."
+    )
+    return 1 if report["failed"] else 0
+
+
+@_with_run_lock
+def cmd_verify(args) -> int:
+    from .core.verify import verify_tree
+
+    root = Path(args.path) if args.path else config.download_path
+    report = verify_tree(
+        root,
+        full=args.full,
+        workers=args.workers,
+        requeue=not args.report_only,
+        progress_callback=lambda done, total: print(f"\r{done}/{total}", end="", flush=True),
+    )
+    print()
+    print(
+        f"Checked {report['letters']} letters: {report['unchanged']} unchanged, {report['hashed']} hashed, "
+        f"{report['adopted']} newly recorded, {len(report['failed'])} failed."
+    )
+    for item in report["failed"]:
+        print(f"  {item['reason']:10} {item['file']}")
+    if report["failed"] and not args.report_only:
+        print("Failed letters were set aside (*.corrupt) and will be downloaded again on the next run.")
+    return 1 if report["failed"] else 0
+
+
+@_with_run_lock
+def cmd_render(args) -> int:
+    from .core.capture import render_captures
+
+    root = Path(args.path) if args.path else config.download_path
+    report = render_captures(
+        root,
+        paper=args.paper,
+        scale=args.scale,
+        workers=args.workers,
+        force=args.force,
+        progress_callback=lambda done, total: print(f"\r{done}/{total}", end="", flush=True),
+    )
+    print()
+    print(
+        f"Rendered {report['rendered']} of {report['captures']} captured letters "
+        f"({report['skipped']} already rendered, {len(report['failed'])} failed)."
+    )
+    for item in report["failed"]:
+        print(f"  {item['capture']}: {item['error']}")
+    return 1 if report["failed"] else 0
+
+
+def cmd_accounts(args) -> int:
+    if args.action in ("add", "remove") and not args.name:
+        print(f"accounts {args.action}: an account name is required")
+        return 2
+    if args.action == "add":
+        account = config.add_account(args.name, args.download_path)
+        print(f"Added account '{account.name}' -> {account.download_path}")
+        print(f"Log in with: login {account.name}")
+    elif args.action == "remove":
+        config.remove_account(args.name)
+        print(f"Removed account '{args.name}' (profile and letters were kept on disk)")
+    else:
+        for name in config.account_names():
+            account = config.get_account(name)
+            print(f"{account.name:20} {account.download_path}")
+    return 0
+
+
+@_with_run_lock
+def cmd_login(args) -> int:
+    import asyncio
+    from .core.backup import login_account
+
+    account = config.get_account(args.account)
+    print(f"Opening browser for '{account.name}'. Please log in to Slowly in that window.")
+    ok = asyncio.run(login_account(account, timeout=args.timeout))
+    print("Login detected, session saved." if ok else "Login not detected.")
+    return 0 if ok else 1
+
+
+def _selected_accounts(args):
+    names = config.account_names() if args.all else (args.account or [config.DEFAULT_ACCOUNT])
+    return [config.get_account(name) for name in names]
+
+
+def cmd_backup(args) -> int:
+    from .core.backup import format_summary, run_backups
+    from .core.metrics import exporter
+    from .core.scheduler import RunLock
+    from .core.tracing import traced_run
+
+    lock = RunLock.default()
+    if not lock.acquire():
+        print("Another sync or backup is running.")
+        return 1
+    if config.get("metrics_enabled"):
+        exporter.start()
+    try:
+        with traced_run():
+            summaries = run_backups(_selected_accounts(args), headless=not args.headed, workers=args.workers)
+    finally:
+        if config.get("metrics_enabled"):
+            exporter.stop()
+        lock.release()
+    for s in summaries:
+        print(format_summary(s))
+    return 1 if any(s["error"] or s["failed"] for s in summaries) else 0
+
+
+def cmd_sync(args) -> int:
+    from .core.scheduler import SyncScheduler
+
+    interval = args.interval or config.get("sync_interval_minutes") or 1440
+    scheduler = SyncScheduler(
+        None if args.all else [a.name for a in _selected_accounts(args)],
+        interval_minutes=interval,
+        headless=not args.headed,
+        workers=args.workers,
+    )
+    if args.once:
+        record = scheduler.run_if_due(force=True)
+        return 1 if record is None or record.get("error") else 0
+    scheduler.run_forever()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="SlowlyLetterDownloader", description="Slowly Letter Downloader")
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("optimize", help="Downsample and recompress images in saved PDFs")
+    p.add_argument("path", nargs="?", help="Folder to process (default: download path)")
+    p.add_argument("--dpi", type=int, help="Target image resolution")
+    p.add_argument("--quality", type=int, help="JPEG quality (1-95)")
+    p.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    p.set_defaults(func=cmd_optimize)
+
+    p = sub.add_parser("verify", help="Check saved letters against their recorded checksums")
+    p.add_argument("path", nargs="?", help="Download folder to check (default: download path)")
+    p.add_argument("--full", action="store_true", help="Hash every letter, even if size and mtime are unchanged")
+    p.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    p.add_argument("--report-only", action="store_true", help="Only report; don't queue failed letters for re-download")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser("render", help="Render captured letters to PDF offline (see capture_only)")
+    p.add_argument("path", nargs="?", help="Download folder with captures (default: download path)")
+    p.add_argument("--paper", choices=["A4", "A5", "Letter", "Legal"], default="A4", help="Paper size")
+    p.add_argument("--scale", type=float, default=1.0, help="Page scale (0.1-2)")
+    p.add_argument("--workers", type=int, help="Letters rendered at once (default: CPU count)")
+    p.add_argument("--force", action="store_true", help="Render letters again even if they already have a PDF")
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("accounts", help="List, add or remove Slowly accounts")
+    p.add_argument("action", nargs="?", choices=["list", "add", "remove"], default="list")
+    p.add_argument("name", nargs="?")
+    p.add_argument("--download-path", help="Output folder for a new account")
+    p.set_defaults(func=cmd_accounts)
+
+    p = sub.add_parser("login", help="Log in to an account in a visible browser")
+    p.add_argument("account", nargs="?", default=config.DEFAULT_ACCOUNT)
+    p.add_argument("--timeout", type=int, default=300, help="Seconds to wait for login")
+    p.set_defaults(func=cmd_login)
+
+    p = sub.add_parser("backup", help="Download all letters for one or more accounts concurrently")
+    p.add_argument("--account", action="append", help="Account to back up (repeatable)")
+    p.add_argument("--all", action="store_true", help="Back up every configured account")
+    p.add_argument("--headed", action="store_true", help="Show the browser windows")
+    p.add_argument("--workers", type=int, help="Browser worker processes per account (default: 1, no sharding)")
+    p.set_defaults(func=cmd_backup)
+
+    p = sub.add_parser("sync", help="Run incremental backups on a schedule")
+    p.add_argument("--interval", type=int, help="Minutes between runs (default: sync_interval_minutes)")
+    p.add_argument("--account", action="append", help="Account to sync (repeatable)")
+    p.add_argument("--all", action="store_true", help="Sync every configured account")
+    p.add_argument("--headed", action="store_true", help="Show the browser windows")
+    p.add_argument("--workers", type=int, help="Browser worker processes per account")
+    p.add_argument("--once", action="store_true", help="Run one sync now (skipped if another is running) and exit")
+    p.set_defaults(func=cmd_sync)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, "func", None):
+        parser.print_help()
+        return 2
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
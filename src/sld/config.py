@@ -1,10 +1,24 @@
 import os
+import re
 import platform
 import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+class Account:
+    """A Slowly account with its own browser profile (session) and output root."""
+    
+    def __init__(self, name: str, profile_path: Path, download_path: Path):
+        self.name = name
+        self.profile_path = profile_path
+        self.download_path = download_path
+
+    def __repr__(self):
+        return f"Account({self.name!r})"
 
 class Config:
+    DEFAULT_ACCOUNT = "default"
+    
     APP_NAME = "SlowlyLetterDownloader"
     
     def __init__(self):
@@ -43,7 +57,42 @@ class Config:
             "download_path": str(Path.home() / "Desktop" / "Slowly Letters"),
             "theme": "System",  # System, Light, Dark
             "letter_format": "pdf", # Future proofing
-            "browser_headless": True
+            "browser_headless": True,
+            "base_url": "https://web.slowly.app",
+            "trace_enabled": False, # Write a Chrome trace of each download run
+            "metrics_enabled": True, # Prometheus textfile under the app data folder
+            "metrics_interval": 15, # Seconds between metrics file writes
+            "log_max_lines": 1000, # Lines kept in the GUI log; the full log goes to logs/sld.log
+            "ui_frame_ms": 100, # How often the GUI picks up progress from the worker
+            "render_wait_timeout": 15, # Seconds to wait for images/fonts before printing
+            "save_photos": False, # Store letter photos once each under _photos/ (content-addressed)
+            "optimize_pdfs": False, # Recompress images in new PDFs after each run
+            "optimize_dpi": 150,
+            "optimize_quality": 75,
+            "rate_initial": 2.0, # Page actions (navigations, prints) per second
+            "rate_min": 0.2,
+            "rate_max": 8.0,
+            "rate_slow_seconds": 5, # Actions slower than this reduce the rate
+            "archive_mode": "", # "penpal" or "account": append letters to letters.tar instead of loose PDFs
+            "storage_backend": "local", # "local" or "s3" (needs boto3; credentials from the AWS environment)
+            "s3_bucket": "",
+            "s3_prefix": "",
+            "s3_endpoint_url": "", # e.g. http://localhost:9000 for MinIO
+            "s3_region": "",
+            "s3_max_uploads": 4, # Concurrent uploads
+            "s3_part_size_mb": 8, # Multipart part size
+            "s3_keep_local": False, # Keep local copies after upload
+            "sync_interval_minutes": 1440, # How often "sync" runs a backup
+            "recycle_letters": 300, # Replace the browser page after this many letters (0 = never)
+            "recycle_rss_mb": 1500, # ...or once the renderer uses more memory than this (Linux)
+            "recycle_mode": "page", # "page" or "context" (restart the whole browser)
+            "capture_only": False, # Save letter pages for the "render" command instead of printing them
+            "asset_cache_mb": 0, # Disk cache (MB) for immutable stamps, fonts and backgrounds, kept between runs (0 = off)
+            "workers": 1, # Browser worker processes per account for CLI backups (1 = no sharding)
+            "max_chromium_rss_mb": 0, # Render fewer letters at once above this memory use (0 = 75% of RAM; Linux)
+            "max_cpu_percent": 90, # ...or above this share of all CPU cores
+            "min_free_mb": 300, # Render one letter at a time when free system memory drops below this
+            "accounts": {} # Extra Slowly accounts: {name: {"download_path": ...}}
         }
         
         if not self.config_file.exists():
@@ -88,5 +137,41 @@ class Config:
         path.mkdir(parents=True, exist_ok=True)
         return path
 
+    def account_names(self) -> List[str]:
+        return [self.DEFAULT_ACCOUNT] + sorted(self.data.get("accounts", {}))
+
+    def get_account(self, name: str = DEFAULT_ACCOUNT) -> Account:
+        """
+        Returns the named account. The default account keeps the original
+        ChromeProfile and download path; others live under Profiles/<name>.
+        """
+        if name == self.DEFAULT_ACCOUNT:
+            return Account(name, self.chrome_profile_path, self.download_path)
+            
+        accounts = self.data.get("accounts", {})
+        if name not in accounts:
+            raise KeyError(f"Unknown account '{name}'")
+            
+        profile_path = self.user_data_dir / "Profiles" / name
+        profile_path.mkdir(parents=True, exist_ok=True)
+        download_path = accounts[name].get("download_path") or str(
+            self.download_path.parent / f"{self.download_path.name} ({name})"
+        )
+        return Account(name, profile_path, Path(download_path))
+
+    def add_account(self, name: str, download_path: str = None) -> Account:
+        if not re.fullmatch(r"[A-Za-z0-9_.-]+", name) or name == self.DEFAULT_ACCOUNT:
+            raise ValueError(f"Invalid account name '{name}' (use letters, digits, '.', '_' or '-')")
+        accounts = dict(self.data.get("accounts", {}))
+        accounts[name] = {"download_path": download_path} if download_path else {}
+        self.set("accounts", accounts)
+        return self.get_account(name)
+
+    def remove_account(self, name: str):
+        """Forgets the account; its profile and letters are left on disk."""
+        accounts = dict(self.data.get("accounts", {}))
+        accounts.pop(name, None)
+        self.set("accounts", accounts)
+
 # Singleton instance
 config = Config()
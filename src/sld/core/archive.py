@@ -0,0 +1,174 @@
+import json
+import os
+import shutil
+import tarfile
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional
+
+BLOCK = tarfile.BLOCKSIZE
+END_OF_ARCHIVE = b"\0" * (2 * BLOCK)
+COPY_CHUNK = 1024 * 1024
+
+
+class LetterArchive:
+    """
+    Append-only tar archive used as an output sink: each letter is appended
+    as it is saved, so backup tools deal with a few large files instead of a
+    large tree. A JSON-lines index next to the archive records every member's
+    data offset and size, giving random access without scanning the tar, and
+    the archive end after each append. On reopen the archive is cut back to
+    the last indexed end, so a crash mid-append loses only that letter.
+    """
+
+    _registry: Dict[Path, "LetterArchive"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.index_path = path.with_name(path.name + ".idx")
+        self.members: Dict[str, Dict] = {}
+        self.end = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def for_path(cls, path: Path) -> "LetterArchive":
+        """Returns the shared instance for path, so every writer appends through one lock."""
+        key = Path(os.path.abspath(path))
+        with cls._registry_lock:
+            archive = cls._registry.get(key)
+            if archive is None:
+                archive = cls._registry[key] = cls(key)
+            return archive
+
+    def _load(self):
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if self.index_path.exists():
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn last line from a crash
+                    if entry["end"] > size:
+                        break
+                    if entry.get("deleted"):
+                        self.members.pop(entry["name"], None)
+                    else:
+                        self.members[entry["name"]] = entry
+                    self.end = entry["end"]
+        elif size:
+            self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Recreates a lost index by walking the tar headers."""
+        try:
+            with tarfile.open(self.path, "r:") as tar:
+                for member in tar:
+                    if member.isfile():
+                        self._record(member.name, member.offset_data, member.size,
+                                     member.offset_data + -(-member.size // BLOCK) * BLOCK)
+        except tarfile.ReadError as e:
+            print(f"Archive {self.path} is damaged after {len(self.members)} letters: {e}")
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            for entry in self.members.values():
+                f.write(json.dumps(entry) + "\n")
+
+    def _record(self, name: str, offset: int, size: int, end: int) -> Dict:
+        entry = {"name": name, "offset": offset, "size": size, "end": end}
+        self.members[name] = entry
+        self.end = end
+        return entry
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.members
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def names(self, prefix: str = "") -> Iterator[str]:
+        return (name for name in self.members if name.startswith(prefix))
+
+    def add(self, source: Path, name: str):
+        """Appends the file at source as member name, copying it in chunks."""
+        info = tarfile.TarInfo(name)
+        stat = source.stat()
+        info.size = stat.st_size
+        info.mtime = int(stat.st_mtime)
+        info.mode = 0o644
+        header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+
+        with self._lock:
+            with open(self.path, "r+b" if self.path.exists() else "wb") as out:
+                # Drop the previous end-of-archive blocks and anything from an interrupted append
+                out.seek(self.end)
+                out.truncate()
+                out.write(header)
+                offset = self.end + len(header)
+                with open(source, "rb") as src:
+                    shutil.copyfileobj(src, out, COPY_CHUNK)
+                padding = -info.size % BLOCK
+                out.write(b"\0" * padding)
+                end = offset + info.size + padding
+                out.write(END_OF_ARCHIVE)
+                out.flush()
+                os.fsync(out.fileno())
+
+            entry = self._record(name, offset, info.size, end)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def forget(self, name: str):
+        """
+        Drops a member from the index (e.g. it failed verification), so the
+        letter counts as missing and is downloaded again. The bytes stay in
+        the tar; a later add() of the same name supersedes them.
+        """
+        with self._lock:
+            if self.members.pop(name, None) is None:
+                return
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"name": name, "deleted": True, "end": self.end}) + "\n")
+
+    def open_member(self, name: str) -> BinaryIO:
+        """Returns a readable stream over one member, read straight from its offset."""
+        entry = self.members[name]
+        f = open(self.path, "rb")
+        f.seek(entry["offset"])
+        return _MemberReader(f, entry["size"])
+
+    def extract(self, name: str, target: Path):
+        with self.open_member(name) as src, open(target, "wb") as out:
+            shutil.copyfileobj(src, out, COPY_CHUNK)
+
+
+class _MemberReader:
+    def __init__(self, f: BinaryIO, size: int):
+        self._f = f
+        self._remaining = size
+
+    def read(self, n: int = -1) -> bytes:
+        if n < 0 or n > self._remaining:
+            n = self._remaining
+        data = self._f.read(n)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def archive_for(download_path: Path, penpal_dir: Path, mode: Optional[str]) -> Optional[LetterArchive]:
+    """Returns the archive a penpal's letters go to for archive_mode 'penpal' or 'account', else None."""
+    if mode == "penpal":
+        return LetterArchive.for_path(penpal_dir / "letters.tar")
+    if mode == "account":
+        return LetterArchive.for_path(download_path / "letters.tar")
+    return None
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from playwright.async_api import Request, Route
+
+from .metrics import metrics
+
+# Request types that are worth caching: the same stamps, fonts, paper
+# backgrounds and avatars come back on every letter
+CACHED_TYPES = ("image", "font", "stylesheet", "media")
+# Headers replayed on a cache hit; fonts need CORS headers to load cross-origin
+KEPT_HEADERS = ("content-type", "access-control-allow-origin", "cache-control", "timing-allow-origin")
+MAX_ENTRY = 16 * 1024 * 1024
+# Shortest max-age still treated as a static asset worth keeping on disk
+MIN_LIFETIME = 7 * 24 * 3600
+# Write the index after this many new entries, so a crash loses little
+SAVE_EVERY = 50
+
+
+def cache_lifetime(headers: Dict[str, str]) -> Optional[float]:
+    """
+    Seconds a response may be served from the cache: None for immutable,
+    its max-age if that is at least MIN_LIFETIME, else 0 (not cached).
+    """
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control or "private" in cache_control:
+        return 0
+    if "immutable" in cache_control:
+        return None
+    match = re.search(r"max-age=(\d+)", cache_control)
+    if match and int(match.group(1)) >= MIN_LIFETIME:
+        return int(match.group(1))
+    return 0
+
+
+class AssetCache:
+    """
+    Disk cache for static assets, plugged into a browser context with
+    context.route(). Bodies are stored content-addressed under blobs/ (one
+    copy however many URLs serve it), and an index maps each URL to its blob,
+    headers and expiry. Entries are kept in least-recently-used order and the
+    oldest are evicted once the blobs exceed max_bytes. The cache persists
+    between runs and may be shared by several processes: blobs are written
+    atomically, the index is merged on save, and a blob evicted by another
+    process is simply a miss.
+    """
+
+    _registry: Dict[Path, "AssetCache"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.index_path = root / "index.json"
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.blob_sizes: Dict[str, int] = {}
+        self.blob_refs: Dict[str, int] = {}
+        self.size = 0
+        self._unsaved = 0
+        self._touched = False
+        # URLs whose responses turned out not to be cacheable; passed straight through next time
+        self._uncacheable: Set[str] = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def for_path(cls, root: Path, max_bytes: int) -> "AssetCache":
+        """Returns the shared instance for root, so every context in a process uses one index."""
+        key = Path(os.path.abspath(root))
+        with cls._registry_lock:
+            cache = cls._registry.get(key)
+            if cache is None:
+                cache = cls._registry[key] = cls(key, max_bytes)
+            return cache
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / digest
+
+    def _read_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error loading asset cache index: {e}")
+            return {}
+
+    def _load(self):
+        entries = sorted(self._read_index().items(), key=lambda item: item[1].get("used", 0))
+        for url, entry in entries:
+            self._insert(url, entry)
+
+    def _insert(self, url: str, entry: Dict):
+        old = self.entries.pop(url, None)
+        if old:
+            self._unref(old["sha"])
+        self.entries[url] = entry
+        digest = entry["sha"]
+        self.blob_refs[digest] = self.blob_refs.get(digest, 0) + 1
+        if digest not in self.blob_sizes:
+            self.blob_sizes[digest] = entry["size"]
+            self.size += entry["size"]
+
+    def _unref(self, digest: str) -> bool:
+        """Drops one reference to a blob; returns True if that was the last one."""
+        self.blob_refs[digest] -= 1
+        if self.blob_refs[digest] > 0:
+            return False
+        del self.blob_refs[digest]
+        self.size -= self.blob_sizes.pop(digest)
+        return True
+
+    def _drop(self, url: str):
+        entry = self.entries.pop(url)
+        if self._unref(entry["sha"]):
+            try:
+                self._blob_path(entry["sha"]).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        # Evict down to 90% of the cap so a full cache doesn't evict on every insert
+        while self.entries and self.size > self.max_bytes * 0.9:
+            self._drop(next(iter(self.entries)))
+
+    def get(self, url: str) -> Optional[tuple]:
+        """Returns (headers, body) for a fresh cached url, or None."""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            if entry.get("expires") and entry["expires"] < time.time():
+                self._drop(url)
+                return None
+            try:
+                body = self._blob_path(entry["sha"]).read_bytes()
+            except FileNotFoundError:
+                self._drop(url)
+                return None
+            entry["used"] = time.time()
+            self.entries.move_to_end(url)
+            self._touched = True
+            return entry["headers"], body
+
+    def put(self, url: str, headers: Dict[str, str], body: bytes) -> bool:
+        """Stores an immutable or long-lived response; returns False if it isn't cacheable."""
+        lifetime = cache_lifetime(headers)
+        if lifetime == 0 or len(body) > MAX_ENTRY or len(body) > self.max_bytes * 0.1:
+            return False
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{digest}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        entry = {
+            "sha": digest,
+            "size": len(body),
+            "headers": {k: v for k, v in headers.items() if k in KEPT_HEADERS},
+            "expires": now + lifetime if lifetime is not None else None,
+            "used": now,
+        }
+        with self._lock:
+            self._insert(url, entry)
+            self._evict()
+            self._unsaved += 1
+            due = self._unsaved >= SAVE_EVERY
+        if due:
+            self.save()
+        return True
+
+    def save(self):
+        """Writes the index, merging entries other processes added since it was loaded."""
+        with self._lock:
+            if not self._unsaved and not self._touched:
+                return
+            for url, entry in self._read_index().items():
+                current = self.entries.get(url)
+                if current is not None and entry.get("used", 0) <= current.get("used", 0):
+                    continue
+                if (current is None or current["sha"] != entry["sha"]) and not self._blob_path(entry["sha"]).exists():
+                    continue
+                self._insert(url, entry)
+            # Re-sort so merged entries take their place in LRU order
+            ordered = sorted(self.entries.items(), key=lambda item: item[1].get("used", 0))
+            self.entries = OrderedDict(ordered)
+            self._evict()
+            try:
+                self.root.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.index_path.with_name(f"index.{os.getpid()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.entries, f)
+                os.replace(tmp_path, self.index_path)
+                self._unsaved = 0
+                self._touched = False
+            except Exception as e:
+                print(f"Error saving asset cache index: {e}")
+
+    async def handle(self, route: Route, request: Request):
+        """context.route() handler: serves cacheable GETs from disk, fetching and storing on a miss."""
+        if (request.method != "GET" or request.resource_type not in CACHED_TYPES
+                or request.url in self._uncacheable):
+            await route.continue_()
+            return
+
+        cached = self.get(request.url)
+        if cached is not None:
+            metrics.asset_cache_hits.inc()
+            headers, body = cached
+            await route.fulfill(status=200, headers=headers, body=body)
+            return
+
+        metrics.asset_cache_misses.inc()
+        try:
+            response = await route.fetch()
+        except Exception:
+            # Let the browser report the failure as it normally would
+            await route.continue_()
+            return
+        body = await response.body()
+        if response.status == 200:
+            try:
+                if not self.put(request.url, response.headers, body):
+                    self._uncacheable.add(request.url)
+            except Exception as e:
+                print(f"Error caching {request.url}: {e}")
+        await route.fulfill(response=response, body=body)
@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from playwright.async_api import Page, Response
+
+PHOTO_SELECTOR = ".slick-slider img"
+
+_PHOTO_URLS_JS = """
+(selector) => {
+    const urls = [];
+    for (const img of document.querySelectorAll(selector)) {
+        // Prefer the largest srcset candidate, then lazy-load attributes, then src
+        let best = null;
+        if (img.srcset) {
+            let width = -1;
+            for (const part of img.srcset.split(',')) {
+                const [url, descriptor] = part.trim().split(/\\s+/);
+                const w = parseFloat(descriptor) || 0;
+                if (w > width) { width = w; best = url; }
+            }
+        }
+        const url = new URL(best || img.dataset.src || img.dataset.lazy || img.src, document.baseURI).href;
+        if (!urls.includes(url)) urls.push(url);
+    }
+    return urls;
+}
+"""
+
+
+class ContentStore:
+    """
+    Content-addressed file store: each blob is saved once as
+    <root>/<sha256[:2]>/<sha256><ext>, so identical photos shared between
+    letters take disk space only once.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def path_for(self, digest: str, ext: str) -> Path:
+        return self.root / digest[:2] / f"{digest}{ext}"
+
+    def put(self, data: bytes, content_type: Optional[str] = None) -> Tuple[str, Path]:
+        """Stores data if new. Returns (sha256, path)."""
+        digest = hashlib.sha256(data).hexdigest()
+        ext = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) or ".bin"
+        path = self.path_for(digest, ext)
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(path.suffix + ".tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+        return digest, path
+
+
+class PhotoCapture:
+    """
+    Captures image bodies from network responses while a letter is open, so
+    the letter's photos can be stored at original resolution without clicking
+    through the carousel. Only responses for images in the letter's photo
+    slider are read; avatars, stamps and paper backgrounds are left alone.
+    """
+
+    def __init__(self, page: Page, store: ContentStore):
+        self.page = page
+        self.store = store
+        self.active = False
+        self._bodies: Dict[str, Tuple[bytes, Optional[str]]] = {}
+        self._photo_urls: Set[str] = set()
+        self._pending: Set[asyncio.Task] = set()
+        page.on("response", self._on_response)
+
+    def detach(self):
+        self.page.remove_listener("response", self._on_response)
+        self.active = False
+        self._bodies.clear()
+        self._photo_urls.clear()
+
+    def begin(self):
+        """Starts collecting image responses for a newly opened letter."""
+        self._bodies.clear()
+        self._photo_urls.clear()
+        self.active = True
+
+    def _on_response(self, response: Response):
+        if not self.active or response.request.resource_type != "image" or not response.ok:
+            return
+        task = asyncio.ensure_future(self._read(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _photo_url(self, url: str) -> bool:
+        """Whether url is one of the open letter's slider photos (the DOM is read again for unknown URLs)."""
+        if url not in self._photo_urls:
+            self._photo_urls.update(await self.page.evaluate(_PHOTO_URLS_JS, PHOTO_SELECTOR))
+        return url in self._photo_urls
+
+    async def _read(self, response: Response):
+        try:
+            if not await self._photo_url(response.url):
+                return
+            body = await response.body()
+        except Exception:
+            # Redirects and evicted responses have no body; collect() refetches
+            return
+        self._bodies[response.url] = (body, response.headers.get("content-type"))
+
+    async def collect(self, base_dir: Path) -> List[str]:
+        """
+        Stores the open letter's photos and returns their paths relative to
+        base_dir. Photos not seen on the network (e.g. served from cache) are
+        fetched once through the page's request context.
+        """
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        self.active = False
+
+        stored = []
+        for url in await self.page.evaluate(_PHOTO_URLS_JS, PHOTO_SELECTOR):
+            entry = self._bodies.get(url)
+            if entry is None:
+                try:
+                    response = await self.page.context.request.get(url)
+                    if not response.ok:
+                        continue
+                    entry = (await response.body(), response.headers.get("content-type"))
+                except Exception as e:
+                    print(f"Could not fetch photo {url}: {e}")
+                    continue
+
+            _, path = self.store.put(*entry)
+            stored.append(path.relative_to(base_dir).as_posix())
+
+        self._bodies.clear()
+        return stored
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .browser import BrowserEngine
+from .downloader import LetterDownloader
+from .metrics import metrics
+from .progress import ProgressReporter
+from .resources import RenderGate, ResourceGovernor, install_gate
+from ..config import Account, config
+
+
+async def backup_account(account: Account, penpals: Optional[List[str]] = None, headless: bool = True,
+                         progress: Optional[ProgressReporter] = None,
+                         log: Callable[[str], None] = print) -> Dict:
+    """
+    Runs a full backup of one account in its own browser profile and output
+    root. Returns a summary {account, penpals, downloaded, skipped, failed, seconds, error}.
+    """
+    progress = progress or ProgressReporter()
+    engine = BrowserEngine(profile_path=account.profile_path)
+    downloader = LetterDownloader(engine, download_path=account.download_path)
+    summary = {"account": account.name, "penpals": 0, "downloaded": 0, "skipped": 0, "failed": 0,
+               "seconds": 0.0, "error": None}
+    started = time.monotonic()
+
+    try:
+        await engine.start(headless=headless)
+        available = await downloader.get_penpals()
+        if not available:
+            raise RuntimeError("No pen pals found (not logged in? run the login command for this account)")
+
+        names = [name for name in (penpals or available) if name in available]
+        downloader.begin_run()
+        progress.begin_run(names)
+        for name in names:
+            log(f"[{account.name}] Downloading letters for {name}...")
+            try:
+                await downloader.process_penpal(name, progress=progress)
+                metrics.penpals_completed.inc()
+            except Exception as e:
+                metrics.penpals_failed.inc()
+                log(f"[{account.name}] Error downloading {name}: {e}")
+        await downloader.retry_failed(progress)
+
+        summary.update(progress.totals())
+    except Exception as e:
+        summary["error"] = str(e)
+        log(f"[{account.name}] Backup failed: {e}")
+    finally:
+        await engine.close()
+        summary["seconds"] = round(time.monotonic() - started, 1)
+
+    return summary
+
+
+async def backup_accounts(accounts: List[Account], headless: bool = True,
+                          log: Callable[[str], None] = print) -> List[Dict]:
+    """Backs up several accounts concurrently, each in an isolated browser context."""
+    return await asyncio.gather(*(backup_account(a, headless=headless, log=log) for a in accounts))
+
+
+def run_backups(accounts: List[Account], headless: bool = True, workers: Optional[int] = None) -> List[Dict]:
+    """
+    Backs up the accounts concurrently. With more than one worker (opt-in),
+    each account is also sharded across that many worker processes.
+    Browsers are closed when it returns.
+    """
+    from .shard import backup_sharded
+
+    workers = max(1, workers or config.get("workers") or 1)
+    # One letter renders at a time per browser; the governor lowers that while memory or CPU is short
+    browsers = workers * len(accounts)
+    resource_governor = None
+    if browsers > 1:
+        gate = RenderGate(browsers)
+        install_gate(gate)
+        resource_governor = ResourceGovernor.from_config(gate, browsers)
+        resource_governor.start()
+    metrics.run_in_progress.set(1)
+    try:
+        if workers > 1:
+            # backup_sharded blocks while its workers run, so each account gets a thread
+            with ThreadPoolExecutor(max_workers=len(accounts), thread_name_prefix="sld-account") as pool:
+                return list(pool.map(lambda a: backup_sharded(a, workers=workers, headless=headless), accounts))
+        return asyncio.run(backup_accounts(accounts, headless=headless))
+    finally:
+        if resource_governor:
+            resource_governor.stop()
+            install_gate(None)
+        metrics.run_in_progress.set(0)
+        metrics.last_run_timestamp.set(time.time())
+
+
+def format_summary(summary: Dict) -> str:
+    status = f"error: {summary['error']}" if summary["error"] else "ok"
+    return (
+        f"{summary['account']}: {summary['downloaded']} downloaded, {summary['skipped']} skipped, "
+        f"{summary['failed']} failed across {summary['penpals']} pen pals in {summary['seconds']}s ({status})"
+    )
+
+
+async def login_account(account: Account, timeout: int = 300) -> bool:
+    """Opens a visible browser on the account's profile and waits for the user to log in."""
+    engine = BrowserEngine(profile_path=account.profile_path)
+    try:
+        await engine.login_mode()
+        return await engine.wait_for_login(timeout)
+    finally:
+        await engine.close()
@@ -1,31 +1,98 @@
 import os
+import re
 import asyncio
-from typing import Optional, Callable
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Tuple
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+from .asset_cache import AssetCache
+from .metrics import metrics
+from .procinfo import renderer_rss
+from .ratelimit import governor
+from .tracing import tracer
 from ..config import config
 
+
+class PageHandle:
+    """
+    Stable stand-in for the engine's page. Attribute access goes to the
+    current Playwright page, and event listeners added through the handle are
+    re-attached when the page is swapped, so code holding the handle keeps
+    working after the engine recycles the page or the whole context.
+    """
+
+    def __init__(self, page: Page):
+        self._page = page
+        self._listeners: List[Tuple[str, Callable]] = []
+
+    def __getattr__(self, name: str):
+        return getattr(self._page, name)
+
+    def on(self, event: str, handler: Callable):
+        self._listeners.append((event, handler))
+        self._page.on(event, handler)
+
+    def remove_listener(self, event: str, handler: Callable):
+        if (event, handler) in self._listeners:
+            self._listeners.remove((event, handler))
+        self._page.remove_listener(event, handler)
+
+    def _swap(self, page: Page):
+        self._page = page
+        for event, handler in self._listeners:
+            page.on(event, handler)
+
+
 class BrowserEngine:
-    def __init__(self):
+    def __init__(self, profile_path: Optional[Path] = None, base_url: Optional[str] = None):
+        self.profile_path = profile_path
+        self.base_url = (base_url or config.get("base_url")).rstrip("/")
         self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
-        self.page: Optional[Page] = None
+        self.page: Optional[PageHandle] = None
         self.is_running = False
+        self.headless = True
+        self.recycle_letters = config.get("recycle_letters") or 0
+        self.recycle_rss = (config.get("recycle_rss_mb") or 0) * 1024 * 1024
+        self.recycle_mode = config.get("recycle_mode") or "page"
+        self._letters_since_recycle = 0
+        self._recycle_hooks: List[Callable[[PageHandle], Awaitable]] = []
+        self.asset_cache = self._asset_cache()
+
+    def _asset_cache(self) -> Optional[AssetCache]:
+        """The account's asset cache if enabled; shard workers' profile copies share their account's."""
+        cache_mb = config.get("asset_cache_mb") or 0
+        if not cache_mb:
+            return None
+        profile_path = self.profile_path or config.chrome_profile_path
+        account_profile = re.sub(r"\.worker\d+$", "", profile_path.name)
+        return AssetCache.for_path(profile_path.parent / f"{account_profile}.asset_cache", cache_mb * 1024 * 1024)
 
     async def start(self, headless: bool = True):
         """Starts the Playwright engine."""
         if self.is_running:
             return
 
+        with tracer.span("browser start", headless=headless):
+            await self._launch(headless)
+
+    async def _launch(self, headless: bool):
         self.playwright = await async_playwright().start()
-        
+        self.headless = headless
+        await self._open_context(headless)
+        self.page = PageHandle(await self._first_page())
+        self.is_running = True
+
+    async def _open_context(self, headless: bool):
         args = ["--disable-blink-features=AutomationControlled"]
         if not headless:
             args.append("--start-maximized")
             
+        profile_path = self.profile_path or config.chrome_profile_path
+
         try:
             self.context = await self.playwright.chromium.launch_persistent_context(
-                user_data_dir=config.chrome_profile_path,
+                user_data_dir=profile_path,
                 channel="chrome",
                 headless=headless,
                 slow_mo=50, 
@@ -36,19 +103,78 @@ class BrowserEngine:
         except Exception as e:
             print(f"Could not launch system Chrome, falling back to bundled Chromium: {e}")
             self.context = await self.playwright.chromium.launch_persistent_context(
-                user_data_dir=config.chrome_profile_path,
+                user_data_dir=profile_path,
                 headless=headless,
                 slow_mo=50,
                 args=args,
                 no_viewport=True
             )
         
+        self.context.on("response", self._on_response)
+        if self.asset_cache:
+            # Note: any route disables Chrome's HTTP cache for the context; the asset cache replaces it for assets
+            await self.context.route("**/*", self.asset_cache.handle)
+
+    async def _first_page(self) -> Page:
         if len(self.context.pages) > 0:
-            self.page = self.context.pages[0]
-        else:
-            self.page = await self.context.new_page()
-            
-        self.is_running = True
+            return self.context.pages[0]
+        return await self.context.new_page()
+
+    def on_recycle(self, hook: Callable[[PageHandle], Awaitable]):
+        """Registers a coroutine run after each recycle, to restore page state (e.g. reopen a list)."""
+        self._recycle_hooks.append(hook)
+
+    async def letter_done(self):
+        """
+        Called after each letter at a point where the page can be replaced.
+        Recycles after recycle_letters letters, or earlier if the renderer's
+        RSS is above recycle_rss_mb (checked every 20 letters, Linux only).
+        """
+        self._letters_since_recycle += 1
+        count = self._letters_since_recycle
+        due = bool(self.recycle_letters) and count >= self.recycle_letters
+        if not due and self.recycle_rss and count % 20 == 0:
+            rss = renderer_rss()
+            due = rss is not None and rss > self.recycle_rss
+        if due:
+            await self.recycle(full=self.recycle_mode == "context")
+
+    async def recycle(self, full: bool = False):
+        """
+        Replaces the page with a fresh one (a new renderer), or with full=True
+        restarts the whole browser context on the same profile. The PageHandle
+        stays valid; registered hooks then restore the page's state.
+        If a new page can't be opened the old one is kept; if the context
+        can't be restarted the engine is closed rather than left half-open.
+        """
+        if not self.is_running:
+            return
+        with tracer.span("recycle", full=full, letters=self._letters_since_recycle):
+            old = self.page._page
+            # Counted from here even on failure, so a failing recycle isn't retried every letter
+            self._letters_since_recycle = 0
+            if full:
+                try:
+                    await self.context.close()
+                except Exception as e:
+                    print(f"Error closing browser context: {e}")
+                try:
+                    await self._open_context(self.headless)
+                    new = await self._first_page()
+                except Exception:
+                    await self.close()
+                    raise
+            else:
+                # Open the new page first so the old renderer isn't reused
+                new = await self.context.new_page()
+                try:
+                    await old.close()
+                except Exception as e:
+                    print(f"Error closing old page: {e}")
+            self.page._swap(new)
+            metrics.recycles.inc()
+            for hook in self._recycle_hooks:
+                await hook(self.page)
 
     async def login_mode(self):
         """Starts browser in HEADED mode for user to login manually."""
@@ -56,7 +182,18 @@ class BrowserEngine:
         await self.start(headless=False)
         
         if self.page:
-            await self.page.goto("https://web.slowly.app", wait_until="networkidle")
+            await self.goto(self.base_url, wait_until="networkidle")
+
+    async def goto(self, url: str, **kwargs):
+        """Navigates the current page (rate-limited)."""
+        with tracer.span("navigate", url=url):
+            async with governor.slot():
+                return await self.page.goto(url, **kwargs)
+
+    def _on_response(self, response):
+        # Only server round trips count; static assets and cache hits don't signal throttling
+        if response.request.resource_type in ("document", "xhr", "fetch"):
+            governor.observe(response.status, response.headers.get("retry-after"))
             
     async def save_session(self):
         """Saves cookies/storage state to disk."""
@@ -72,6 +209,8 @@ class BrowserEngine:
         """Closes the browser and stops Playwright."""
         if self.context:
             await self.context.close()
+        if self.asset_cache:
+            self.asset_cache.save()
         if self.playwright:
             await self.playwright.stop()
             
@@ -0,0 +1,309 @@
+import asyncio
+import json
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from playwright.async_api import Page, async_playwright
+
+from .archive import archive_for
+from .attachments import ContentStore
+from .manifest import PenpalManifest
+from .pdf_info import append_info
+from .pdf_render import print_options, print_to_pdf
+from .storage import create_storage
+from .verify import checksum_fields
+from ..config import config
+
+CAPTURE_DIR = ".captures"
+# Only these are needed to lay out a letter; API calls and scripts are not
+ASSET_INITIATORS = ("img", "image", "css", "link")
+# Write the asset index after this many captures; save() writes the rest
+SAVE_EVERY = 25
+
+# Serializes the open letter: a copy of the DOM without scripts (the render
+# stage runs with JavaScript off), with rules that CSS-in-JS inserted through
+# the CSSOM written out as text, images pinned to the srcset candidate the
+# browser chose, and the URLs of every static asset the page loaded.
+_SERIALIZE_JS = """
+() => {
+    const doc = document.documentElement.cloneNode(true);
+    const liveStyles = document.querySelectorAll('style');
+    const copiedStyles = doc.querySelectorAll('style');
+    liveStyles.forEach((style, i) => {
+        try {
+            if (style.sheet && !style.textContent.trim()) {
+                copiedStyles[i].textContent = Array.from(style.sheet.cssRules).map(r => r.cssText).join('\\n');
+            }
+        } catch (e) {}
+    });
+    const liveImages = document.querySelectorAll('img');
+    const copiedImages = doc.querySelectorAll('img');
+    liveImages.forEach((img, i) => {
+        if (img.currentSrc) {
+            copiedImages[i].setAttribute('src', img.currentSrc);
+            copiedImages[i].removeAttribute('srcset');
+            copiedImages[i].removeAttribute('loading');
+        }
+    });
+    doc.querySelectorAll('script, noscript, link[rel=preload], link[rel=modulepreload], link[rel=prefetch]')
+        .forEach(el => el.remove());
+
+    const urls = new Set();
+    for (const entry of performance.getEntriesByType('resource')) {
+        if (INITIATORS.includes(entry.initiatorType)) urls.add(entry.name);
+    }
+    liveImages.forEach(img => img.currentSrc && urls.add(img.currentSrc));
+    document.querySelectorAll('link[rel=stylesheet]').forEach(link => urls.add(link.href));
+    return {
+        html: '<!DOCTYPE html>' + doc.outerHTML,
+        url: location.href,
+        viewport: {width: window.innerWidth, height: window.innerHeight},
+        urls: Array.from(urls).filter(u => u.startsWith('http')),
+    };
+}
+""".replace("INITIATORS", json.dumps(list(ASSET_INITIATORS)))
+
+
+class CaptureStore:
+    """
+    Letters saved for offline rendering, under <download path>/.captures:
+    one JSON file per letter (serialized DOM, page URL, viewport and the
+    letter's manifest fields) in a folder per penpal, and the assets they
+    reference stored once in a content-addressed assets/ folder. The URLs
+    stored are indexed in assets.json, or assets.<writer>.json for a named
+    writer (each shard worker), so concurrent writers never overwrite each
+    other; all of them are merged on load.
+    """
+
+    def __init__(self, download_path: Path, writer: Optional[str] = None):
+        self.download_path = download_path
+        self.root = download_path / CAPTURE_DIR
+        self.assets = ContentStore(self.root / "assets")
+        self.assets_index = self.root / (f"assets.{writer}.json" if writer else "assets.json")
+        self.urls: Dict[str, List] = {}
+        # This writer's index: what it loaded plus what it stored since
+        self._own: Dict[str, List] = {}
+        self._unsaved = 0
+        self._captured = 0
+        if self.root.is_dir():
+            for path in sorted(self.root.glob("assets*.json")):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        urls = json.load(f)
+                except Exception as e:
+                    print(f"Error loading {path}: {e}")
+                    continue
+                self.urls.update(urls)
+                if path == self.assets_index:
+                    self._own = urls
+
+    def letter_path(self, penpal_dir: Path, letter_number: int) -> Path:
+        return self.root / penpal_dir.name / f"letter_{letter_number}.json"
+
+    def captured(self, penpal_dir: Path) -> Set[int]:
+        """Letter numbers captured for a penpal folder."""
+        numbers = set()
+        folder = self.root / penpal_dir.name
+        if folder.is_dir():
+            for entry in os.scandir(folder):
+                match = re.fullmatch(r"letter_(\d+)\.json", entry.name)
+                if match:
+                    numbers.add(int(match.group(1)))
+        return numbers
+
+    def captures(self) -> List[Path]:
+        if not self.root.is_dir():
+            return []
+        return sorted(self.root.glob("*/letter_*.json"))
+
+    def save(self):
+        """Writes this writer's asset index if anything was stored since the last save."""
+        if not self._unsaved:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.assets_index.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._own, f)
+        os.replace(tmp_path, self.assets_index)
+        self._unsaved = 0
+
+    async def _fetch_asset(self, page: Page, url: str, asset_cache=None):
+        cached = asset_cache.get(url) if asset_cache else None
+        if cached is not None:
+            headers, body = cached
+        else:
+            response = await page.context.request.get(url)
+            if not response.ok:
+                return
+            headers, body = response.headers, await response.body()
+        content_type = headers.get("content-type")
+        _, path = self.assets.put(body, content_type)
+        self.urls[url] = self._own[url] = [path.relative_to(self.root).as_posix(), content_type]
+        self._unsaved += 1
+
+    async def capture(self, page: Page, penpal_dir: Path, letter_number: int, fields: Dict,
+                      asset_cache=None) -> Path:
+        """
+        Saves the letter open in page; fields (penpal, file, date, photos...)
+        are kept for the render stage. Assets not stored by an earlier
+        capture are taken from the browser's asset cache or fetched once.
+        The asset index is written every SAVE_EVERY captures; call save()
+        when done. Returns the capture file.
+        """
+        snapshot = await page.evaluate(_SERIALIZE_JS)
+        for url in snapshot["urls"]:
+            if url in self.urls:
+                continue
+            try:
+                await self._fetch_asset(page, url, asset_cache)
+            except Exception as e:
+                print(f"Could not capture asset {url}: {e}")
+
+        data = dict(fields, letter=letter_number, url=snapshot["url"], viewport=snapshot["viewport"],
+                    assets=[u for u in snapshot["urls"] if u in self.urls], html=snapshot["html"])
+        path = self.letter_path(penpal_dir, letter_number)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        self._captured += 1
+        if self._captured % SAVE_EVERY == 0:
+            self.save()
+        return path
+
+
+class OfflineRenderer:
+    """
+    Turns captures into PDFs without Slowly: each capture is loaded into a
+    fresh browser context with JavaScript off and every request answered
+    from the capture (anything else is aborted, so nothing reaches the
+    network). Several letters render at once. Captures are kept, so letters
+    can be rendered again later at another paper size or scale.
+    """
+
+    def __init__(self, download_path: Path, paper: str = "A4", scale: float = 1.0,
+                 workers: Optional[int] = None, force: bool = False):
+        self.download_path = download_path
+        self.store = CaptureStore(download_path)
+        self.options = print_options(paper, scale)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.force = force
+        self.storage = create_storage(download_path)
+        self.archive_mode = None if self.storage.name != "local" else config.get("archive_mode") or None
+        self._manifests: Dict[Path, PenpalManifest] = {}
+
+    def _manifest(self, penpal_dir: Path) -> PenpalManifest:
+        if penpal_dir not in self._manifests:
+            self._manifests[penpal_dir] = PenpalManifest(penpal_dir)
+        return self._manifests[penpal_dir]
+
+    def _is_rendered(self, penpal_dir: Path, data: Dict) -> bool:
+        entry = self._manifest(penpal_dir).get(data["letter"])
+        return bool(entry and entry.get("sha256")) or (penpal_dir / data["file"]).exists()
+
+    async def _route(self, route, data: Dict):
+        url = route.request.url
+        if url == data["url"]:
+            await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=data["html"])
+            return
+        asset = self.store.urls.get(url)
+        if asset is None:
+            await route.abort()
+            return
+        headers = {"access-control-allow-origin": "*"}
+        if asset[1]:
+            headers["content-type"] = asset[1]
+        await route.fulfill(status=200, headers=headers, path=str(self.store.root / asset[0]))
+
+    async def _render(self, browser, capture_path: Path) -> Optional[Path]:
+        with open(capture_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        penpal_dir = self.download_path / capture_path.parent.name
+        if not self.force and self._is_rendered(penpal_dir, data):
+            return None
+
+        context = await browser.new_context(java_script_enabled=False, viewport=data["viewport"],
+                                            service_workers="block")
+        try:
+            await context.route("**/*", lambda route: self._route(route, data))
+            page = await context.new_page()
+            await page.goto(data["url"], wait_until="networkidle")
+            penpal_dir.mkdir(parents=True, exist_ok=True)
+            output_path = penpal_dir / data["file"]
+            await print_to_pdf(page, output_path, options=self.options)
+        finally:
+            await context.close()
+
+        await self._store(penpal_dir, output_path, data)
+        return output_path
+
+    async def _store(self, penpal_dir: Path, output_path: Path, data: Dict):
+        """Adds metadata and files the PDF like the downloader does (archive, storage, manifest)."""
+        append_info(output_path, {"Letter": str(data["letter"]), "Penpal": data.get("penpal", "")})
+        checksum = checksum_fields(output_path)
+        archive = archive_for(self.download_path, penpal_dir, self.archive_mode)
+        archived = None
+        if archive:
+            checksum.pop("mtime")
+            in_penpal_dir = archive.path.parent == penpal_dir
+            archive.add(output_path, data["file"] if in_penpal_dir else f"{penpal_dir.name}/{data['file']}")
+            output_path.unlink()
+            archived = os.path.relpath(archive.path, penpal_dir)
+        else:
+            await self.storage.put(output_path, output_path.relative_to(self.download_path).as_posix())
+        self._manifest(penpal_dir).record(data["letter"], file=data["file"], date=data.get("date"),
+                                          photos=data.get("photos", []), archive=archived, **checksum)
+
+    async def run(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict:
+        captures = self.store.captures()
+        report = {"captures": len(captures), "rendered": 0, "skipped": 0, "failed": []}
+        if not captures:
+            return report
+
+        playwright = await async_playwright().start()
+        browser = None
+        try:
+            try:
+                browser = await playwright.chromium.launch(channel="chrome", headless=True)
+            except Exception:
+                browser = await playwright.chromium.launch(headless=True)
+            slots = asyncio.Semaphore(self.workers)
+            done = 0
+
+            async def render_one(path: Path):
+                nonlocal done
+                async with slots:
+                    try:
+                        if await self._render(browser, path):
+                            report["rendered"] += 1
+                        else:
+                            report["skipped"] += 1
+                    except Exception as e:
+                        report["failed"].append({"capture": str(path.relative_to(self.download_path)), "error": str(e)})
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, len(captures))
+
+            await asyncio.gather(*(render_one(path) for path in captures))
+        finally:
+            if browser:
+                await browser.close()
+            await playwright.stop()
+            for manifest in self._manifests.values():
+                manifest.flush()
+            if self.storage.name != "local":
+                for penpal_dir in self._manifests:
+                    name = PenpalManifest.FILENAME
+                    await self.storage.put(penpal_dir / name, f"{penpal_dir.name}/{name}", keep_local=True)
+            await self.storage.close()
+        return report
+
+
+def render_captures(download_path: Path, paper: str = "A4", scale: float = 1.0, workers: Optional[int] = None,
+                    force: bool = False, progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """Renders every capture under download_path to PDF. Returns {captures, rendered, skipped, failed}."""
+    renderer = OfflineRenderer(download_path, paper=paper, scale=scale, workers=workers, force=force)
+    return asyncio.run(renderer.run(progress_callback))
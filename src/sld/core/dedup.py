@@ -0,0 +1,90 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pdfrw import PdfReader
+
+from .pdf_info import read_info
+
+
+def read_letter_number(path: Path) -> Optional[int]:
+    """The /Letter number stored in a PDF's Info dictionary, or None."""
+    info = read_info(path)
+    if info is None:
+        # No classic trailer (xref streams): fall back to a full parse
+        letter = PdfReader(str(path)).Info.Letter
+        value = str(letter).strip("()") if letter is not None else None
+    else:
+        value = info.get("Letter")
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LetterScanCache:
+    """
+    Which letters already exist in a penpal folder, found from the /Letter
+    metadata of its PDFs (so files saved by older versions, under other
+    names, are recognised too). Results are cached in .letter_scan.json by
+    file name with size and mtime; a rescan stats each file and only reads
+    the ones that are new or changed, and then only their trailer.
+    """
+
+    FILENAME = ".letter_scan.json"
+
+    def __init__(self, penpal_dir: Path):
+        self.penpal_dir = penpal_dir
+        self.path = penpal_dir / self.FILENAME
+        self.entries: Dict[str, List] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"Error loading scan cache {self.path}: {e}")
+
+    def scan(self) -> Dict[int, str]:
+        """Returns {letter number: file name} for the PDFs in the folder."""
+        letters: Dict[int, str] = {}
+        seen = set()
+        changed = False
+        try:
+            with os.scandir(self.penpal_dir) as entries:
+                for entry in entries:
+                    if not entry.name.lower().endswith(".pdf") or not entry.is_file():
+                        continue
+                    seen.add(entry.name)
+                    stat = entry.stat()
+                    cached = self.entries.get(entry.name)
+                    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                        number = cached[2]
+                    else:
+                        try:
+                            number = read_letter_number(Path(entry.path))
+                        except Exception as e:
+                            print(f"Error reading {entry.path}: {e}")
+                            continue
+                        self.entries[entry.name] = [stat.st_size, stat.st_mtime_ns, number]
+                        changed = True
+                    if number is not None:
+                        letters[number] = entry.name
+        except FileNotFoundError:
+            return letters
+
+        for name in set(self.entries) - seen:
+            del self.entries[name]
+            changed = True
+        if changed:
+            self._save()
+        return letters
+
+    def _save(self):
+        try:
+            tmp_path = self.path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving scan cache {self.path}: {e}")
@@ -1,22 +1,88 @@
 import asyncio
+import os
 import re
 import base64
+import time
 from pathlib import Path
 from typing import List, Callable, Dict, Optional
 from pdfrw import PdfReader, PdfWriter
 
+from .archive import LetterArchive, archive_for
+from .attachments import ContentStore, PhotoCapture
+from .capture import CaptureStore
+from .dedup import LetterScanCache
 from .browser import BrowserEngine
-from .utils import sanitize_filename
+from .extract import (
+    BACK_BUTTON_SELECTOR, LETTER_CARD_SELECTOR, SIGNATURE_SELECTOR,
+    click_letter_card, extract_friends, extract_letters, scroll_to_bottom, wait_for_render,
+)
+from .manifest import PenpalManifest
+from .metrics import metrics
+from .pdf_info import append_info
+from .pdf_render import print_to_pdf
+from .progress import ProgressReporter
+from .ratelimit import governor
+from .resources import render_slot
+from .retry import RenderError, RetryQueue
+from .storage import StorageBackend, create_storage
+from .tracing import tracer
+from .utils import DirectoryIndex, sanitize_filename
+from .verify import checksum_fields
 from ..config import config
 
+# Content-addressed photo store shared by all letters; its files are never removed after upload
+PHOTOS_DIR = "_photos"
+
 class LetterDownloader:
-    def __init__(self, browser_engine: BrowserEngine):
+    def __init__(self, browser_engine: BrowserEngine, download_path: Optional[Path] = None):
         self.browser = browser_engine
+        self._download_path = download_path
         self.stop_requested = False
+        self.friends: Dict[str, Dict] = {}
+        self.penpal_dirs: Dict[str, Path] = {}
+        # PDFs written as files during the current run (see begin_run)
+        self.written: List[Path] = []
+        self.retry_queue = RetryQueue()
+        self.archive_mode = config.get("archive_mode") or None
+        self._storage: Optional[StorageBackend] = None
+        self._stored_photos: Optional[set] = None
+        self._current_penpal: Optional[str] = None
+        # Save letter pages for the offline render stage instead of printing them
+        self.capture_only = bool(config.get("capture_only"))
+        self._captures: Optional[CaptureStore] = None
+        # Names this downloader's capture asset index when several write at once (shard workers)
+        self.capture_writer: Optional[str] = None
+        self.browser.on_recycle(self._restore_after_recycle)
+
+    @property
+    def download_path(self) -> Path:
+        """Output root; falls back to the configured download path."""
+        return self._download_path or config.download_path
+
+    @property
+    def storage(self) -> StorageBackend:
+        """Backend finished files are handed to (local folder by default)."""
+        if self._storage is None:
+            self._storage = create_storage(self.download_path)
+            if self._storage.name != "local" and self.archive_mode:
+                print(f"archive_mode is not supported with {self._storage.name} storage; saving letters as files.")
+                self.archive_mode = None
+        return self._storage
+
+    @property
+    def captures(self) -> CaptureStore:
+        if self._captures is None:
+            self._captures = CaptureStore(self.download_path, writer=self.capture_writer)
+        return self._captures
+
+    def _storage_key(self, path: Path) -> str:
+        return path.relative_to(self.download_path).as_posix()
         
     def _add_metadata(self, pdf_path: Path, letter_count: int, penpal_name: str):
         """Adds metadata to the PDF file."""
         try:
+            if append_info(pdf_path, {"Letter": str(letter_count), "Penpal": penpal_name}):
+                return
             trailer = PdfReader(str(pdf_path))
             trailer.Info.Letter = str(letter_count)
             trailer.Info.Penpal = penpal_name
@@ -24,136 +90,433 @@ class LetterDownloader:
         except Exception as e:
             print(f"Error adding metadata to {pdf_path}: {e}")
 
+    def begin_run(self):
+        """Rescans the download folder, so names created since the last run are not handed out again."""
+        DirectoryIndex.for_dir(self.download_path, refresh=True)
+        self.written = []
+
     async def get_penpals(self) -> Dict[str, str]:
         """
         Scans the home page for penpals.
-        Returns a dict of {name: profile_url} (or just list of names/elements if simplified).
-        Currently just returns a list of names for selection.
+        Returns a dict of {name: profile_url}; full entries (avatar, activity)
+        are kept in self.friends.
         """
         if not self.browser.page:
             return {}
             
         if "home" not in self.browser.page.url:
-            await self.browser.page.goto("https://web.slowly.app/home")
-            await self.browser.page.wait_for_load_state("networkidle")
+            await self.browser.goto(f"{self.browser.base_url}/home", wait_until="networkidle")
+
+        self.friends = {f["name"]: f for f in await extract_friends(self.browser.page)}
+        return {name: f["href"] for name, f in self.friends.items()}
+
+    def _penpal_dir(self, penpal_name: str) -> Path:
+        """
+        Returns the penpal's output directory. Penpals whose names sanitize to
+        the same folder name (e.g. non-Latin names) get "name (1)", "name (2)"...
+        instead of sharing one folder; the owner is recorded in its manifest.
+        """
+        def owner_of(candidate: str) -> Optional[str]:
+            return PenpalManifest(self.download_path / candidate).data.get("penpal")
+
+        self.download_path.mkdir(parents=True, exist_ok=True)
+        index = DirectoryIndex.for_dir(self.download_path)
+        penpal_dir = index.allocate(sanitize_filename(penpal_name), owner=penpal_name,
+                                    owner_of=owner_of, split_suffix=False)
+        penpal_dir.mkdir(parents=True, exist_ok=True)
+        self.penpal_dirs[penpal_name] = penpal_dir
+        return penpal_dir
 
-        penpals = {}
+    def _record_letter(self, penpal_name: str, outcome: str, progress: Optional[ProgressReporter]):
+        """Counts a letter outcome ('downloaded', 'skipped' or 'failed')."""
+        getattr(metrics, f"letters_{outcome}").inc()
+        if progress:
+            progress.letter_done(penpal_name, outcome)
 
-        friend_links = await self.browser.page.locator(".side-bar a[href^='/friend/']").all()
+    async def _open_penpal(self, page, penpal_name: str, progress: Optional[ProgressReporter] = None) -> Optional[List[Dict]]:
+        """Opens a penpal's letter list and scrolls it fully. Returns the letter cards, or None if there are none."""
+        self._current_penpal = penpal_name
+        if progress:
+            progress.set_status(f"Opening {penpal_name}...")
+        
+        with tracer.span("navigate", penpal=penpal_name):
+            async with governor.slot():
+                try:
+                    await page.locator(f".side-bar h6:text-is('{penpal_name}')").click()
+                except Exception as e:
+                    print(f"Direct click failed ({e}), trying strict False or partial match...")
+                    metrics.retries.inc()
+                    await page.locator(f".side-bar h6:has-text('{penpal_name}')").first.click()
+                
+                await page.wait_for_url("**/friend/**")
         
-        for link in friend_links:
-            name_el = link.locator("h6")
-            if await name_el.count() > 0:
-                name = await name_el.inner_text()
-                if name:
-                    penpals[name] = name 
+        try:
+             await page.wait_for_selector(LETTER_CARD_SELECTOR, timeout=5000)
+        except:
+             return None
+        
+        if progress:
+            progress.set_status(f"Loading letter list for {penpal_name}...")
+        
+        with tracer.span("scroll", penpal=penpal_name):
+            last_height = await scroll_to_bottom(page)
+            while True:
+                await page.wait_for_timeout(1000) # Wait for load
+                new_height = await scroll_to_bottom(page)
+                if new_height == last_height:
+                    break
+                last_height = new_height
+            
+        return await extract_letters(page)
+
+    async def _start_session(self, page, penpal_name: str) -> "_PenpalSession":
+        penpal_dir = self._penpal_dir(penpal_name)
+        manifest = PenpalManifest(penpal_dir)
+        if manifest.data.get("penpal") != penpal_name:
+            manifest.data["penpal"] = penpal_name
+            manifest.save()
+        # One scandir per penpal instead of a stat per letter
+        existing = DirectoryIndex.for_dir(penpal_dir, refresh=True)
+        
+        photos = None
+        if config.get("save_photos"):
+            photos = PhotoCapture(page, ContentStore(self.download_path / PHOTOS_DIR))
+        # Letters already on disk by their /Letter metadata, whatever the file is called
+        with tracer.span("dedup scan", penpal=penpal_name):
+            on_disk = LetterScanCache(penpal_dir).scan()
+        storage = self.storage
+        archive = archive_for(self.download_path, penpal_dir, self.archive_mode)
+        # Letters uploaded by earlier runs may no longer exist locally
+        stored = set()
+        if storage.name != "local":
+            stored = await storage.list(penpal_dir.name)
+            # Retry letters whose upload failed in an earlier run
+            for name in existing.names - stored:
+                if name.endswith(".pdf"):
+                    await storage.put(penpal_dir / name, self._storage_key(penpal_dir / name))
+        captured = self.captures.captured(penpal_dir) if self.capture_only else set()
+        return _PenpalSession(penpal_name, penpal_dir, manifest, existing, photos, archive, storage, stored,
+                              on_disk, captured)
+
+    async def _process_letter(self, page, session: "_PenpalSession", index: int, letter_number: int) -> str:
+        """
+        Opens the letter card at index, saves it if new, and returns to the list.
+        Returns 'downloaded' or 'skipped'; raises on failure (IndexError if
+        the card no longer exists).
+        """
+        penpal_name = session.penpal_name
+        if session.photos:
+            session.photos.begin()
+        with tracer.span("card click", penpal=penpal_name, letter=letter_number):
+            async with governor.slot():
+                count = await click_letter_card(page, index)
+        
+        if count >= 0:
+            raise IndexError(f"Index {index} out of range (count {count}). List changed?")
+        
+        signature_loc = page.locator(SIGNATURE_SELECTOR)
+        with tracer.span("signature wait", penpal=penpal_name, letter=letter_number):
+            await signature_loc.wait_for(timeout=5000)
+        
+        text_content = await signature_loc.inner_text() 
+        lines = text_content.split('\n')
+        date_str = "UnknownDate"
+        if len(lines) > 1:
+             date_line = lines[1]
+             date_str = sanitize_filename(date_line)[:20]
+        
+        filename = f"letter_{letter_number}_{session.safe_name}.pdf" 
+        
+        output_path = session.penpal_dir / filename
+        
+        if session.has(filename, letter_number):
+             print(f"Skipping {filename}, exists.")
+             outcome = "skipped"
+        elif self.capture_only:
+            with tracer.span("image wait", penpal=penpal_name, letter=letter_number):
+                await wait_for_render(page, config.get("render_wait_timeout"))
+            photo_paths = await self._collect_photos(session, letter_number)
+            fields = {"penpal": penpal_name, "file": filename, "date": date_str, "photos": photo_paths}
+            with tracer.span("capture", penpal=penpal_name, letter=letter_number):
+                await self.captures.capture(page, session.penpal_dir, letter_number, fields,
+                                            self.browser.asset_cache)
+            session.captured.add(letter_number)
+            outcome = "downloaded"
+        else:
+            async with render_slot():
+                with tracer.span("image wait", penpal=penpal_name, letter=letter_number):
+                    barrier = await wait_for_render(page, config.get("render_wait_timeout"))
+                if barrier["timed_out"] or barrier["failed"]:
+                    print(f"Letter {letter_number}: images not fully loaded ({barrier}), printing anyway.")
+                
+                render_start = time.perf_counter()
+                with tracer.span("print", penpal=penpal_name, letter=letter_number):
+                    # A token only: printing is local, so its duration says nothing about the server
+                    await governor.acquire()
+                    try:
+                        await print_to_pdf(page, output_path)
+                    except Exception as e:
+                        raise RenderError(str(e)) from e
+                metrics.render_seconds.observe(time.perf_counter() - render_start)
+            with tracer.span("metadata", penpal=penpal_name, letter=letter_number):
+                self._add_metadata(output_path, letter_number, penpal_name)
+            checksum = checksum_fields(output_path)
+            metrics.bytes_written.inc(checksum["size"])
+            if session.archive:
+                checksum.pop("mtime")
+                with tracer.span("archive", penpal=penpal_name, letter=letter_number):
+                    session.archive.add(output_path, session.member_name(filename))
+                output_path.unlink()
+            else:
+                session.existing.add(filename)
+                self.written.append(output_path)
+                await self.storage.put(output_path, self._storage_key(output_path))
+            
+            photo_paths = await self._collect_photos(session, letter_number)
+            archived = os.path.relpath(session.archive.path, session.penpal_dir) if session.archive else None
+            session.manifest.record(letter_number, file=filename, date=date_str, photos=photo_paths,
+                                    archive=archived, **checksum)
+            outcome = "downloaded"
+
+        with tracer.span("back", penpal=penpal_name, letter=letter_number):
+            await self._back_to_list(page)
+        return outcome
+
+    async def _letter_finished(self):
+        """
+        Lets the engine recycle the page between letters. Runs outside a
+        letter's error handling, so a failed recycle is logged instead of
+        marking an already saved letter as failed.
+        """
+        try:
+            await self.browser.letter_done()
+        except Exception as e:
+            print(f"Error recycling the browser page: {e}")
+            if not self.browser.is_running:
+                print("Browser could not be restarted; stopping this run.")
+                self.stop_requested = True
+
+    async def _collect_photos(self, session: "_PenpalSession", letter_number: int) -> List[str]:
+        """Saves the open letter's photos (if enabled) and returns their paths relative to the download path."""
+        if not session.photos:
+            return []
+        with tracer.span("photos", penpal=session.penpal_name, letter=letter_number):
+            photo_paths = await session.photos.collect(self.download_path)
+        if self.storage.name == "local":
+            return photo_paths
+        if self._stored_photos is None:
+            # Photos are shared between letters and sessions; upload each one once
+            self._stored_photos = {f"{PHOTOS_DIR}/{key}" for key in await self.storage.list(PHOTOS_DIR)}
+        for photo in photo_paths:
+            if photo not in self._stored_photos and (self.download_path / photo).exists():
+                await self.storage.put(self.download_path / photo, photo, keep_local=True)
+                self._stored_photos.add(photo)
+        return photo_paths
+
+    async def _restore_after_recycle(self, page):
+        """Brings a fresh page back to the letter list it replaced, so the loop continues where it was."""
+        if not self._current_penpal:
+            return
+        await self.browser.goto(f"{self.browser.base_url}/home", wait_until="networkidle")
+        if await self._open_penpal(page, self._current_penpal) is None:
+            print(f"Could not reopen {self._current_penpal} after recycling the page")
+
+    async def _back_to_list(self, page):
+        back_btn = page.locator(BACK_BUTTON_SELECTOR).first
+        async with governor.slot():
+            if await back_btn.count() > 0:
+                await back_btn.click()
+            else:
+                await page.go_back()
         
-        return penpals
+        await page.wait_for_selector(LETTER_CARD_SELECTOR)
+
+    async def _recover_list(self, page):
+        """Best-effort return to the letter list after an error."""
+        try:
+            if await page.locator(LETTER_CARD_SELECTOR).first.is_visible():
+                return
+            await page.go_back()
+            await page.wait_for_selector(LETTER_CARD_SELECTOR, timeout=5000)
+        except Exception:
+            pass
 
-    async def process_penpal(self, penpal_name: str, progress_callback: Optional[Callable] = None):
+    async def process_penpal(self, penpal_name: str, progress_callback: Optional[Callable] = None,
+                             progress: Optional[ProgressReporter] = None):
         """
         Navigates to a penpal's letters and downloads them.
+        progress_callback receives one message per event; progress aggregates
+        counts for UIs that poll at their own rate. Letters that fail are
+        queued in self.retry_queue for retry_failed().
         """
         page = self.browser.page
         if not page:
             return
 
         print(f"Processing {penpal_name}...")
+        if progress:
+            progress.start_penpal(penpal_name)
         
-        try:
-            await page.locator(f".side-bar h6:text-is('{penpal_name}')").click()
-        except Exception as e:
-            print(f"Direct click failed ({e}), trying strict False or partial match...")
-            await page.locator(f".side-bar h6:has-text('{penpal_name}')").first.click()
-            
-        
-        await page.wait_for_url("**/friend/**")
-        
-        try:
-             await page.wait_for_selector(".col-6.col-xl-4.mb-3", timeout=5000)
-        except:
+        letters = await self._open_penpal(page, penpal_name, progress)
+        if not letters:
              if progress_callback: progress_callback(f"No letters found for {penpal_name} (or timeout)")
+             if progress:
+                 progress.add_summary(f"No letters found for {penpal_name} (or timeout)")
+                 progress.finish_penpal(penpal_name)
              return
         
-        last_height = await page.evaluate("document.body.scrollHeight")
-        while True:
-            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            await page.wait_for_timeout(1000) # Wait for load
-            new_height = await page.evaluate("document.body.scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
-            
-        letters = await page.locator(".col-6.col-xl-4.mb-3").all()
         total_letters = len(letters)
         print(f"Found {total_letters} letters for {penpal_name}")
+        if progress:
+            progress.set_total(penpal_name, total_letters)
         
-        safe_penpal_name = sanitize_filename(penpal_name)
-        penpal_dir = config.download_path / safe_penpal_name
-        penpal_dir.mkdir(parents=True, exist_ok=True)
-        
- 
-        
-        for i in range(total_letters):
-            if self.stop_requested:
-                break
-                
+        session = await self._start_session(page, penpal_name)
+        try:
+            for i in range(total_letters):
+                if self.stop_requested:
+                    break
 
-            
-            try:
-                current_letters_loc = page.locator(".col-6.col-xl-4.mb-3")
-                count = await current_letters_loc.count()
-                
-                if i >= count:
-                    print(f"Index {i} out of range (count {count}). List changed?")
+                letter_number = total_letters - i
+                if progress:
+                    progress.set_status(f"{penpal_name}: letter {i + 1} of {total_letters}")
+                try:
+                    outcome = await self._process_letter(page, session, i, letter_number)
+                except IndexError as e:
+                    print(e)
                     break
-                    
-                await current_letters_loc.nth(i).click()
-                
-                signature_loc = page.locator(".media-body.mx-3.mt-2")
+                except Exception as e:
+                    print(f"Error processing letter {i} for {penpal_name}: {e}")
+                    self.retry_queue.add(penpal_name, letter_number, e)
+                    if progress:
+                        progress.letter_done(penpal_name, "failed")
+                    await self._recover_list(page)
+                    await self._letter_finished()
+                    continue
+
+                self._record_letter(penpal_name, outcome, progress)
+                await self._letter_finished()
+                if outcome == "downloaded" and progress_callback:
+                    progress_callback(f"Downloaded letter_{letter_number}_{session.safe_name}.pdf")
+        finally:
+            # Writes the manifest records still batched, even if the penpal failed part way
+            await session.close()
+            if self._captures:
+                self._captures.save()
+        print(f"Finished {penpal_name}")
+        if progress:
+            progress.finish_penpal(penpal_name)
+
+    async def retry_failed(self, progress: Optional[ProgressReporter] = None,
+                           report_path: Optional[Path] = None) -> Optional[Path]:
+        """
+        Final pass over letters that failed during the main sweep, honouring
+        each item's backoff. Writes failed_letters.json (or report_path) for
+        anything that still fails and returns its path (None if all recovered).
+        """
+        page = self.browser.page
+        while page and len(self.retry_queue) and not self.stop_requested:
+            for penpal_name, items in self.retry_queue.take().items():
+                if self.stop_requested:
+                    # Keep the letters not tried for the report; the while loop ends after this
+                    for item in items:
+                        self.retry_queue.requeue(item)
+                    continue
+                if progress:
+                    progress.set_status(f"Retrying {len(items)} letter(s) for {penpal_name}...")
                 try:
-                    await signature_loc.wait_for(timeout=5000)
-                except:
-                    print(f"Signature not found for letter {i}, assuming load error.")
-                    await page.go_back()
-                    await page.wait_for_selector(".col-6.col-xl-4.mb-3")
+                    letters = await self._open_penpal(page, penpal_name)
+                except Exception as e:
+                    letters = None
+                    print(f"Could not reopen {penpal_name} for retries: {e}")
+                if not letters:
+                    for item in items:
+                        self.retry_queue.add(penpal_name, item.letter_number,
+                                             RuntimeError(f"Could not open letter list ({item.message})"), item.attempts + 1)
                     continue
                 
-                text_content = await signature_loc.inner_text() 
-                lines = text_content.split('\n')
-                date_str = "UnknownDate"
-                if len(lines) > 1:
-                     date_line = lines[1]
-                     date_str = sanitize_filename(date_line)[:20]
-                
-                filename = f"letter_{total_letters - i}_{safe_penpal_name}.pdf" 
-                
-                output_path = penpal_dir / filename
-                
-                if output_path.exists():
-                     print(f"Skipping {filename}, exists.")
-                else:
-                    await page.pdf(path=output_path, format="A4", print_background=True)
-                    self._add_metadata(output_path, total_letters - i, penpal_name)
-                    
-                    if progress_callback:
-                        progress_callback(f"Downloaded {filename}")
-
-                back_btn = page.locator("a.flip.active").first
-                if await back_btn.count() > 0:
-                    await back_btn.click()
-                else:
-                    await page.go_back()
-                
-                await page.wait_for_selector(".col-6.col-xl-4.mb-3")
-                
-            except Exception as e:
-                print(f"Error processing letter {i} for {penpal_name}: {e}")
-                if "friend" not in page.url:
-                     await page.go_back()
+                session = await self._start_session(page, penpal_name)
                 try:
-                    await page.wait_for_selector(".col-6.col-xl-4.mb-3", timeout=5000)
-                except:
-                    pass
+                    for position, item in enumerate(items):
+                        if self.stop_requested:
+                            for untried in items[position:]:
+                                self.retry_queue.requeue(untried)
+                            break
+                        delay = item.next_at - time.monotonic()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
 
-        print(f"Finished {penpal_name}")
+                        metrics.retries.inc()
+                        # Index from the letter number, in case new letters arrived since the sweep
+                        index = len(letters) - item.letter_number
+                        try:
+                            outcome = await self._process_letter(page, session, index, item.letter_number)
+                        except Exception as e:
+                            print(f"Retry {item.attempts} of letter {item.letter_number} for {penpal_name} failed: {e}")
+                            self.retry_queue.add(penpal_name, item.letter_number, e, item.attempts + 1)
+                            await self._recover_list(page)
+                            await self._letter_finished()
+                            continue
+
+                        getattr(metrics, f"letters_{outcome}").inc()
+                        await self._letter_finished()
+                        if progress:
+                            progress.letter_recovered(penpal_name, outcome)
+                finally:
+                    await session.close()
+                    if self._captures:
+                        self._captures.save()
+        
+        for item in self.retry_queue.failed:
+            metrics.letters_failed.inc()
+        await self.storage.flush()
+        if self.storage.failed and progress:
+            progress.add_summary(f"{len(self.storage.failed)} file(s) failed to upload; they will be retried next run.")
+        report = self.retry_queue.write_report(report_path or self.download_path / "failed_letters.json")
+        if progress and report:
+            unfinished = len(self.retry_queue.failed) + len(self.retry_queue)
+            progress.add_summary(f"{unfinished} letter(s) still failed or were not retried; see {report}")
+        self.retry_queue = RetryQueue()
+        return report
+
+
+class _PenpalSession:
+    """Per-penpal output state shared by the main sweep and the retry pass."""
+
+    def __init__(self, penpal_name: str, penpal_dir: Path, manifest: PenpalManifest,
+                 existing: DirectoryIndex, photos: Optional[PhotoCapture],
+                 archive: Optional[LetterArchive] = None, storage: Optional[StorageBackend] = None,
+                 stored: Optional[set] = None, on_disk: Optional[Dict[int, str]] = None,
+                 captured: Optional[set] = None):
+        self.penpal_name = penpal_name
+        self.safe_name = sanitize_filename(penpal_name)
+        self.penpal_dir = penpal_dir
+        self.manifest = manifest
+        self.existing = existing
+        self.photos = photos
+        self.archive = archive
+        self.storage = storage
+        self.stored = stored or set()
+        self.on_disk = on_disk or {}
+        self.captured = captured or set()
+        # An account-wide archive keeps one folder per penpal inside it
+        in_penpal_dir = archive is None or archive.path.parent == penpal_dir
+        self.member_prefix = "" if in_penpal_dir else f"{penpal_dir.name}/"
+
+    def member_name(self, filename: str) -> str:
+        return self.member_prefix + filename
+
+    def has(self, filename: str, letter_number: Optional[int] = None) -> bool:
+        """True if the letter was already saved, as a loose file or in the archive."""
+        if filename in self.existing or letter_number in self.on_disk or letter_number in self.captured:
+            return True
+        if filename in self.stored:
+            return True
+        return self.archive is not None and self.member_name(filename) in self.archive
+
+    async def close(self):
+        self.manifest.flush()
+        if self.photos:
+            self.photos.detach()
+        manifest_path = self.penpal_dir / PenpalManifest.FILENAME
+        if self.storage and manifest_path.exists():
+            await self.storage.put(manifest_path, f"{self.penpal_dir.name}/{manifest_path.name}", keep_local=True)
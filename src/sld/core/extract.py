@@ -0,0 +1,102 @@
+# In-page bulk extraction: each helper is a single page.evaluate, so listing
+# N friends or letters costs one IPC round trip instead of one per element.
+from typing import Any, Dict, List
+
+from playwright.async_api import Page
+
+FRIEND_LINK_SELECTOR = ".side-bar a[href^='/friend/']"
+LETTER_CARD_SELECTOR = ".col-6.col-xl-4.mb-3"
+SIGNATURE_SELECTOR = ".media-body.mx-3.mt-2"
+BACK_BUTTON_SELECTOR = "a.flip.active"
+
+_FRIENDS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector)).map((a) => {
+    const name = a.querySelector('h6');
+    const avatar = a.querySelector('img');
+    const activity = a.querySelector('small');
+    return {
+        name: name ? name.innerText.trim() : '',
+        href: a.getAttribute('href'),
+        avatar: avatar ? avatar.src : null,
+        activity: activity ? activity.innerText.trim() : null,
+    };
+}).filter((friend) => friend.name)
+"""
+
+_LETTERS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector)).map((card, index) => {
+    const date = card.querySelector('small, time, .date');
+    return {
+        index: index,
+        date: date ? date.innerText.trim() : null,
+        preview: card.innerText.trim().slice(0, 200),
+    };
+})
+"""
+
+_CLICK_CARD_JS = """
+([selector, index]) => {
+    const cards = document.querySelectorAll(selector);
+    if (index >= cards.length) return cards.length;
+    cards[index].scrollIntoView({block: 'center'});
+    cards[index].click();
+    return -1;
+}
+"""
+
+_SCROLL_JS = """
+() => {
+    window.scrollTo(0, document.body.scrollHeight);
+    return document.body.scrollHeight;
+}
+"""
+
+_RENDER_BARRIER_JS = """
+async (timeoutMs) => {
+    const images = Array.from(document.images);
+    // Lazy images outside the viewport would never load on their own
+    images.forEach((img) => { if (img.loading === 'lazy') img.loading = 'eager'; });
+    const decoded = images.map((img) => img.decode().then(() => 0, () => 1));
+    const fonts = document.fonts ? document.fonts.ready.then(() => 0) : Promise.resolve(0);
+    let timer;
+    const timeout = new Promise((resolve) => { timer = setTimeout(() => resolve(null), timeoutMs); });
+    const results = await Promise.race([Promise.all([fonts, ...decoded]), timeout]);
+    clearTimeout(timer);
+    return {
+        images: images.length,
+        failed: results ? results.reduce((a, b) => a + b, 0) : null,
+        timed_out: results === null,
+    };
+}
+"""
+
+async def extract_friends(page: Page) -> List[Dict[str, Any]]:
+    """All sidebar friends as {name, href, avatar, activity}."""
+    return await page.evaluate(_FRIENDS_JS, FRIEND_LINK_SELECTOR)
+
+
+async def extract_letters(page: Page) -> List[Dict[str, Any]]:
+    """All loaded letter cards as {index, date, preview}."""
+    return await page.evaluate(_LETTERS_JS, LETTER_CARD_SELECTOR)
+
+
+async def click_letter_card(page: Page, index: int) -> int:
+    """
+    Clicks the index-th letter card in one round trip.
+    Returns -1 on success, otherwise the current card count (index out of range).
+    """
+    return await page.evaluate(_CLICK_CARD_JS, [LETTER_CARD_SELECTOR, index])
+
+
+async def scroll_to_bottom(page: Page) -> int:
+    """Scrolls to the bottom and returns the page height before new content loads."""
+    return await page.evaluate(_SCROLL_JS)
+
+
+async def wait_for_render(page: Page, timeout: float = 15) -> Dict[str, Any]:
+    """
+    Waits (in-page, without polling) until every image is decoded and web
+    fonts are loaded, or the timeout in seconds expires.
+    Returns {images, failed, timed_out}.
+    """
+    return await page.evaluate(_RENDER_BARRIER_JS, int(timeout * 1000))
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Write manifest.json after this many recorded letters; flush() writes the rest
+SAVE_EVERY = 25
+
+
+class PenpalManifest:
+    """
+    Per-penpal record of downloaded letters, stored as manifest.json in the
+    penpal directory. Keys are letter numbers (as strings, for JSON).
+    Records are saved in batches; call flush() when the penpal is done.
+    """
+    FILENAME = "manifest.json"
+
+    def __init__(self, penpal_dir: Path):
+        self.path = penpal_dir / self.FILENAME
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.data: Dict[str, Any] = {"letters": {}}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+                self.data.setdefault("letters", {})
+            except Exception as e:
+                print(f"Error loading manifest {self.path}: {e}")
+
+    @property
+    def letters(self) -> Dict[str, Dict[str, Any]]:
+        return self.data["letters"]
+
+    def get(self, letter_number: int) -> Optional[Dict[str, Any]]:
+        return self.letters.get(str(letter_number))
+
+    def record(self, letter_number: int, **fields: Any):
+        """Merges fields into a letter's entry; saves every SAVE_EVERY records."""
+        with self._lock:
+            self.letters.setdefault(str(letter_number), {}).update(fields)
+            self._unsaved += 1
+            due = self._unsaved >= SAVE_EVERY
+        if due:
+            self.save()
+
+    def flush(self):
+        """Saves records not yet written."""
+        if self._unsaved:
+            self.save()
+
+    def forget(self, letter_number):
+        """Drops a letter's entry (saved with the next save())."""
+        with self._lock:
+            self.letters.pop(str(letter_number), None)
+
+    def save(self):
+        with self._lock:
+            try:
+                tmp_path = self.path.with_suffix(".json.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.data, f, indent=4)
+                os.replace(tmp_path, self.path)
+                self._unsaved = 0
+            except Exception as e:
+                print(f"Error saving manifest {self.path}: {e}")
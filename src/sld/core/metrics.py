@@ -0,0 +1,161 @@
+import os
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from ..config import config
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {self.value:g}",
+        ]
+
+
+class Gauge(Counter):
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    DEFAULT_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 30, 60)
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            if index < len(self.counts):
+                self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f"{self.name}_sum {total:g}")
+        lines.append(f"{self.name}_count {count}")
+        return lines
+
+
+class Metrics:
+    """Process-wide counters and histograms for download runs."""
+
+    def __init__(self):
+        self.letters_downloaded = Counter("sld_letters_downloaded_total", "Letters saved as PDF.")
+        self.letters_skipped = Counter("sld_letters_skipped_total", "Letters skipped because they already exist.")
+        self.letters_failed = Counter("sld_letters_failed_total", "Letters that could not be saved.")
+        self.bytes_written = Counter("sld_bytes_written_total", "Bytes of PDF output written.")
+        self.retries = Counter("sld_retries_total", "Retried page actions.")
+        self.penpals_completed = Counter("sld_penpals_completed_total", "Pen pals fully processed.")
+        self.penpals_failed = Counter("sld_penpals_failed_total", "Pen pals aborted with an error.")
+        self.recycles = Counter("sld_browser_recycles_total", "Page or context recycles during runs.")
+        self.asset_cache_hits = Counter("sld_asset_cache_hits_total", "Static assets served from the local asset cache.")
+        self.asset_cache_misses = Counter("sld_asset_cache_misses_total", "Cacheable static assets fetched from the network.")
+        self.throttled = Counter("sld_throttled_total", "Responses that triggered a rate-limit backoff (429/5xx).")
+        self.rate_limit = Gauge("sld_rate_limit_per_second", "Current page-action rate allowed by the governor.")
+        self.run_in_progress = Gauge("sld_run_in_progress", "1 while a download run is active.")
+        self.last_run_timestamp = Gauge("sld_last_run_finished_timestamp_seconds", "Unix time the last run finished.")
+        self.render_slots = Gauge("sld_render_slots", "Letters allowed to render at once by the resource governor.")
+        self.chromium_rss = Gauge("sld_chromium_rss_bytes", "Resident memory of this process and its browsers.")
+        self.render_seconds = Histogram("sld_render_seconds", "Time to print one letter to PDF.")
+
+    def _all(self):
+        return [v for v in vars(self).values() if isinstance(v, (Counter, Histogram))]
+
+    def counter_values(self) -> Dict[str, float]:
+        return {name: v.value for name, v in vars(self).items() if type(v) is Counter}
+
+    def add_counts(self, values: Dict[str, float]):
+        """Adds counter deltas reported by another process."""
+        for name, amount in values.items():
+            counter = getattr(self, name, None)
+            if type(counter) is Counter and amount:
+                counter.inc(amount)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._all():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """
+    Periodically writes metrics in Prometheus text format so a node exporter
+    textfile collector can scrape them. Writes are atomic (temp file + rename).
+    """
+
+    def __init__(self, registry: Metrics, path: Optional[Path] = None, interval: float = 15):
+        self.registry = registry
+        self.path = path or config.user_data_dir / "metrics" / "sld.prom"
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".prom.tmp")
+            tmp_path.write_text(self.registry.render(), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error writing metrics to {self.path}: {e}")
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.write()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self.write()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+
+# Singleton instances
+metrics = Metrics()
+exporter = MetricsExporter(metrics, interval=config.get("metrics_interval") or 15)
@@ -0,0 +1,178 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+TAIL_SIZE = 2048
+MAX_TAIL_SIZE = 64 * 1024
+MAX_OBJECT_SIZE = 64 * 1024
+
+_STARTXREF = re.compile(rb"startxref\s+(\d+)\s+%%EOF", re.S)
+_TRAILER = re.compile(rb"trailer\s*<<(.*?)>>\s*startxref", re.S)
+_REF = rb"\s+(\d+)\s+(\d+)\s+R"
+_VALUE = rb"(\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>|/[^\s/<>\[\]()]+|[-+\d.]+)"
+_ENTRY = re.compile(rb"/([^\s/<>\[\]()]+)\s*" + _VALUE)
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+
+def pdf_string(value: str) -> bytes:
+    """Encodes text as a PDF string: literal for ASCII, UTF-16BE hex otherwise."""
+    try:
+        raw = value.encode("ascii")
+    except UnicodeEncodeError:
+        return b"<FEFF" + value.encode("utf-16-be").hex().upper().encode("ascii") + b">"
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _unescape(match) -> bytes:
+    octal, char = match.groups()
+    if octal is not None:
+        return bytes([int(octal, 8) & 0xFF])
+    if char in (b"\r", b"\n", b"\r\n"):
+        return b""  # line continuation
+    # Any other character after a backslash stands for itself (the backslash is dropped)
+    return _ESCAPES.get(char, char)
+
+
+def _decode(value: bytes) -> str:
+    """Decodes a PDF string, name or number token to text."""
+    if value.startswith(b"("):
+        raw = re.sub(rb"\\(?:([0-7]{1,3})|(\r\n|.))", _unescape, value[1:-1], flags=re.S)
+    elif value.startswith(b"<"):
+        raw = bytes.fromhex(re.sub(rb"\s", b"", value[1:-1]).decode("ascii"))
+    else:
+        return value.lstrip(b"/").decode("latin-1")
+    if raw.startswith(b"\xfe\xff"):
+        return raw[2:].decode("utf-16-be", "replace")
+    return raw.decode("latin-1")
+
+
+def _read_tail(f, size: int) -> Tuple[bytes, int]:
+    """Returns the last bytes of the file that contain the final trailer, and their offset."""
+    f.seek(0, os.SEEK_END)
+    end = f.tell()
+    while True:
+        start = max(0, end - size)
+        f.seek(start)
+        tail = f.read(end - start)
+        if (_TRAILER.search(tail) and _STARTXREF.search(tail)) or start == 0 or size >= MAX_TAIL_SIZE:
+            return tail, start
+        size *= 4
+
+
+def _object_offset(f, xref_offset: int, number: int) -> Optional[int]:
+    """Looks up an object in a classic xref table by seeking, without reading the whole table."""
+    f.seek(xref_offset)
+    if f.readline().strip() != b"xref":
+        return None
+    while True:
+        header = f.readline().split()
+        if len(header) != 2:
+            return None
+        first, count = int(header[0]), int(header[1])
+        entries_at = f.tell()
+        if first <= number < first + count:
+            f.seek(entries_at + (number - first) * 20)
+            entry = f.read(20).split()
+            return int(entry[0]) if len(entry) == 3 and entry[2] == b"n" else None
+        f.seek(entries_at + count * 20)
+
+
+def _read_dict_object(f, offset: int) -> Optional[bytes]:
+    """Returns the body of the dictionary object at offset (between the outer << >>)."""
+    f.seek(offset)
+    data = f.read(MAX_OBJECT_SIZE)
+    end = data.find(b"endobj")
+    start = data.find(b"<<")
+    if end < 0 or start < 0 or start > end:
+        return None
+    close = data.rfind(b">>", start, end)
+    return data[start + 2:close] if close > start else None
+
+
+def _locate_info(f) -> Optional[Dict]:
+    """Parses the last trailer; returns its /Size, /Root, /Info and /ID, or None without a classic trailer."""
+    tail, _ = _read_tail(f, TAIL_SIZE)
+    trailers = list(_TRAILER.finditer(tail))
+    startxref = list(_STARTXREF.finditer(tail))
+    if not trailers or not startxref:
+        return None
+    trailer = trailers[-1].group(1)
+    size = re.search(rb"/Size\s+(\d+)", trailer)
+    root = re.search(rb"/Root" + _REF, trailer)
+    if not size or not root:
+        return None
+    info = re.search(rb"/Info" + _REF, trailer)
+    doc_id = re.search(rb"/ID\s*\[[^\]]*\]", trailer)
+    return {
+        "prev": int(startxref[-1].group(1)),
+        "size": int(size.group(1)),
+        "root": (root.group(1), root.group(2)),
+        "info": (int(info.group(1)), int(info.group(2))) if info else None,
+        "id": doc_id.group(0) if doc_id else None,
+    }
+
+
+def read_info(path: Path) -> Optional[Dict[str, str]]:
+    """
+    Reads the Info dictionary by parsing only the trailer at the end of the
+    file and the Info object it points to, instead of the whole document.
+    Returns {} if there is no Info, or None if the file has no classic xref
+    trailer (callers can fall back to a full parser).
+    """
+    with open(path, "rb") as f:
+        located = _locate_info(f)
+        if located is None:
+            return None
+        if located["info"] is None:
+            return {}
+        offset = _object_offset(f, located["prev"], located["info"][0])
+        body = _read_dict_object(f, offset) if offset is not None else None
+    if body is None:
+        return None
+    return {m.group(1).decode("latin-1"): _decode(m.group(2)) for m in _ENTRY.finditer(body)}
+
+
+def append_info(path: Path, fields: Dict[str, str]) -> bool:
+    """
+    Sets Info dictionary entries by appending an incremental update to the
+    PDF (new Info object, one-entry xref section, trailer with /Prev). Only
+    the tail and the old Info object are read, so memory does not depend on
+    file size. Returns False if the file has no classic xref trailer (e.g.
+    xref streams); callers should fall back to rewriting the file then.
+    """
+    with open(path, "r+b") as f:
+        located = _locate_info(f)
+        if located is None:
+            return False
+        prev, size, root, info, doc_id = (located[k] for k in ("prev", "size", "root", "info", "id"))
+
+        body = b""
+        if info:
+            number, generation = info
+            offset = _object_offset(f, prev, number)
+            body = (_read_dict_object(f, offset) if offset is not None else None) or b""
+        else:
+            number, generation = size, 0
+            size += 1
+
+        for key, value in fields.items():
+            # Drop any previous value of the key: string, hex string, name or number
+            body = re.sub(rb"\s*/" + key.encode("ascii") +
+                          rb"\s*" + _VALUE, b"", body)
+            body = body.rstrip() + b"\n/" + key.encode("ascii") + b" " + pdf_string(str(value))
+
+        f.seek(0, os.SEEK_END)
+        f.seek(f.tell() - 1)
+        prefix = b"" if f.read(1) == b"\n" else b"\n"
+        object_offset = f.tell() + len(prefix)
+        update = prefix + b"%d %d obj\n<<%s>>\nendobj\n" % (number, generation, body.strip())
+        xref_offset = object_offset + len(update) - len(prefix)
+        update += b"xref\n%d 1\n%010d %05d n \n" % (number, object_offset, generation)
+        update += b"trailer\n<</Size %d /Root %s %s R /Info %d %d R /Prev %d%s>>\n" % (
+            size, root[0], root[1], number, generation, prev,
+            b" " + doc_id if doc_id else b"",
+        )
+        update += b"startxref\n%d\n%%%%EOF\n" % xref_offset
+        f.write(update)
+    return True
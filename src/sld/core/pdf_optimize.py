@@ -0,0 +1,213 @@
+import hashlib
+import io
+import math
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from PIL import Image
+from pdfrw import PdfDict, PdfName, PdfReader, PdfWriter
+
+from .verify import update_checksums
+
+_COLOR_MODES = {1: "L", 3: "RGB"}
+
+
+def _filters(obj) -> list:
+    f = obj.Filter
+    if f is None:
+        return []
+    return list(f) if isinstance(f, list) else [f]
+
+
+def _components(obj) -> Optional[int]:
+    cs = obj.ColorSpace
+    if cs == PdfName.DeviceRGB:
+        return 3
+    if cs == PdfName.DeviceGray:
+        return 1
+    if isinstance(cs, list) and len(cs) == 2 and cs[0] == PdfName.ICCBased:
+        return int(cs[1].N)
+    return None
+
+
+def _raw(obj) -> bytes:
+    return obj.stream.encode("latin-1") if obj.stream is not None else b""
+
+
+def _decode_image(obj) -> Optional[Image.Image]:
+    """Decodes an 8-bit Gray/RGB image XObject, or returns None if unsupported."""
+    components = _components(obj)
+    if components not in _COLOR_MODES or int(obj.BitsPerComponent or 0) != 8:
+        return None
+    if obj.ImageMask or obj.Decode or obj.DecodeParms:
+        return None
+
+    filters = _filters(obj)
+    raw = _raw(obj)
+    width, height = int(obj.Width), int(obj.Height)
+    if filters == [PdfName.DCTDecode]:
+        img = Image.open(io.BytesIO(raw))
+        img.load()
+        return img
+    if filters == [PdfName.FlateDecode]:
+        data = zlib.decompress(raw)
+        mode = _COLOR_MODES[components]
+        if len(data) != width * height * components:
+            return None
+        return Image.frombytes(mode, (width, height), data)
+    return None
+
+
+def _image_xobjects(pdf) -> Iterator[Tuple[dict, PdfName, PdfDict, Tuple[float, float]]]:
+    """Yields (xobject dict, name, image, page size in points) for every image, including nested forms."""
+    seen = set()
+    for page in pdf.pages:
+        box = [float(v) for v in page.inheritable.MediaBox]
+        size = (box[2] - box[0], box[3] - box[1])
+        stack = [page.inheritable.Resources]
+        while stack:
+            resources = stack.pop()
+            if not resources or not resources.XObject:
+                continue
+            for name, xobj in resources.XObject.items():
+                if xobj.Subtype == PdfName.Image:
+                    yield resources.XObject, name, xobj, size
+                elif xobj.Subtype == PdfName.Form and id(xobj) not in seen:
+                    seen.add(id(xobj))
+                    stack.append(xobj.Resources)
+
+
+def _resize_mask(mask: PdfDict, size: Tuple[int, int]):
+    img = _decode_image(mask)
+    if img is None or img.mode != "L":
+        return False
+    img = img.resize(size, Image.LANCZOS)
+    mask.stream = zlib.compress(img.tobytes(), 9).decode("latin-1")
+    mask.Width, mask.Height = size
+    mask.Filter = PdfName.FlateDecode
+    return True
+
+
+def _recompress(obj: PdfDict, page_size: Tuple[float, float], dpi: int, quality: int) -> bool:
+    """Downsamples and re-encodes one image XObject in place. Returns True if it shrank."""
+    img = _decode_image(obj)
+    if img is None:
+        return False
+
+    # An image can't usefully be shown larger than its page, so cap it at page size * dpi
+    max_px = math.ceil(max(page_size) / 72.0 * dpi)
+    scale = min(1.0, max_px / max(img.size))
+    new_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    if new_size == img.size and _filters(obj) == [PdfName.DCTDecode]:
+        # Already JPEG at an acceptable size; re-encoding would only lose quality
+        return False
+    if new_size != img.size:
+        img = img.resize(new_size, Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    data = buffer.getvalue()
+    if len(data) >= len(_raw(obj)):
+        return False
+
+    if obj.SMask and new_size != (int(obj.Width), int(obj.Height)):
+        if not _resize_mask(obj.SMask, new_size):
+            return False
+
+    obj.stream = data.decode("latin-1")
+    obj.Filter = PdfName.DCTDecode
+    obj.Width, obj.Height = new_size
+    return True
+
+
+def _image_key(obj) -> str:
+    """Identity of an image XObject for dedup: pixels, format and soft mask contents."""
+    digest = hashlib.sha256(_raw(obj))
+    digest.update(repr((obj.Width, obj.Height, obj.Filter, obj.ColorSpace)).encode())
+    mask = obj.SMask
+    if mask is not None:
+        # Same pixels with a different soft mask must stay separate images
+        digest.update(_raw(mask))
+        digest.update(repr((mask.Width, mask.Height, mask.Filter)).encode())
+    return digest.hexdigest()
+
+
+def optimize_pdf(path: str, dpi: int = 150, quality: int = 75) -> Tuple[int, int]:
+    """
+    Re-encodes embedded images to at most `dpi` and JPEG `quality`, and
+    merges duplicate image XObjects. Rewrites the file only if it got smaller.
+    Returns (size before, size after).
+    """
+    before = os.path.getsize(path)
+    pdf = PdfReader(path)
+
+    canonical: Dict[str, PdfDict] = {}
+    changed = False
+    for xobjects, name, obj, page_size in list(_image_xobjects(pdf)):
+        key = _image_key(obj)
+        original = canonical.get(key)
+        if original is not None:
+            if original is not obj:
+                xobjects[name] = original
+                changed = True
+            continue
+        canonical[key] = obj
+        try:
+            changed |= _recompress(obj, page_size, dpi, quality)
+        except Exception as e:
+            print(f"Skipping image {name} in {path}: {e}")
+
+    if not changed:
+        return before, before
+
+    tmp_path = f"{path}.opt.tmp"
+    PdfWriter(tmp_path, trailer=pdf, compress=True).write()
+    after = os.path.getsize(tmp_path)
+    if after < before:
+        os.replace(tmp_path, path)
+        return before, after
+    os.remove(tmp_path)
+    return before, before
+
+
+def optimize_tree(paths: Iterable[Path], dpi: int = 150, quality: int = 75, workers: Optional[int] = None,
+                  progress_callback: Optional[Callable] = None) -> Dict[str, int]:
+    """
+    Optimizes PDFs in parallel across processes.
+    Returns {files, optimized, failed, bytes_before, bytes_after, bytes_saved}.
+    """
+    report = {"files": 0, "optimized": 0, "failed": 0, "bytes_before": 0, "bytes_after": 0}
+    files = [str(p) for p in paths]
+    changed = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {pool.submit(optimize_pdf, f, dpi, quality): f for f in files}
+        for future in as_completed(futures):
+            report["files"] += 1
+            try:
+                before, after = future.result()
+            except Exception as e:
+                report["failed"] += 1
+                print(f"Error optimizing {futures[future]}: {e}")
+                continue
+            report["bytes_before"] += before
+            report["bytes_after"] += after
+            if after < before:
+                report["optimized"] += 1
+                changed.append(Path(futures[future]))
+            if progress_callback:
+                progress_callback(report["files"], len(files))
+
+    # Optimized letters have new content; keep their recorded checksums valid for verify
+    update_checksums(changed)
+    report["bytes_saved"] = report["bytes_before"] - report["bytes_after"]
+    return report
+
+
+def find_pdfs(root: Path) -> Iterator[Path]:
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.lower().endswith(".pdf"):
+                yield Path(dirpath) / filename
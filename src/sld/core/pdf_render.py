@@ -0,0 +1,66 @@
+import base64
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+# Bytes requested per IO.read; bounds Python-side memory per letter
+CHUNK_SIZE = 1024 * 1024
+
+# Matches page.pdf(format="A4", print_background=True): A4 in inches, no margins
+PRINT_OPTIONS = {
+    "paperWidth": 8.27,
+    "paperHeight": 11.7,
+    "marginTop": 0,
+    "marginBottom": 0,
+    "marginLeft": 0,
+    "marginRight": 0,
+    "printBackground": True,
+    "transferMode": "ReturnAsStream",
+}
+
+# Paper sizes for offline re-rendering, (width, height) in inches
+PAPER_SIZES = {
+    "A4": (8.27, 11.7),
+    "A5": (5.83, 8.27),
+    "Letter": (8.5, 11),
+    "Legal": (8.5, 14),
+}
+
+
+def print_options(paper: str = "A4", scale: float = 1.0) -> Dict:
+    """PRINT_OPTIONS for another paper size and/or scale."""
+    width, height = PAPER_SIZES[paper]
+    return dict(PRINT_OPTIONS, paperWidth=width, paperHeight=height, scale=scale)
+
+
+async def print_to_pdf(page, path: Path, chunk_size: int = CHUNK_SIZE, options: Optional[Dict] = None) -> int:
+    """
+    Prints the page with CDP Page.printToPDF in stream mode and copies the
+    stream to path chunk by chunk, so the PDF is never held in memory whole.
+    Writes to a .part file first; returns the number of bytes written.
+    """
+    tmp_path = path.with_name(path.name + ".part")
+    cdp = await page.context.new_cdp_session(page)
+    try:
+        result = await cdp.send("Page.printToPDF", options or PRINT_OPTIONS)
+        handle = result["stream"]
+        written = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                while True:
+                    chunk = await cdp.send("IO.read", {"handle": handle, "size": chunk_size})
+                    data = chunk.get("data", "")
+                    if data:
+                        data = base64.b64decode(data) if chunk.get("base64Encoded") else data.encode("utf-8")
+                        f.write(data)
+                        written += len(data)
+                    if chunk.get("eof"):
+                        break
+        finally:
+            await cdp.send("IO.close", {"handle": handle})
+        os.replace(tmp_path, path)
+        return written
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        await cdp.detach()
@@ -0,0 +1,66 @@
+import os
+from typing import Dict, List, Optional
+
+# Memory figures come from /proc, so they are only available on Linux;
+# callers get None elsewhere and skip memory-based decisions.
+HAS_PROC = os.path.isdir("/proc")
+
+
+def _children() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read().decode(errors="replace")
+            # The command name may contain spaces; fields resume after the last ')'
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+            children.setdefault(ppid, []).append(int(entry))
+        except (OSError, ValueError, IndexError):
+            continue
+    return children
+
+
+def descendants(root_pid: int) -> List[int]:
+    """root_pid and every process below it."""
+    children = _children()
+    found = []
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        found.append(pid)
+        stack.extend(children.get(pid, []))
+    return found
+
+
+def rss(pid: int) -> int:
+    """Resident set size of one process in bytes (0 if it is gone)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_tree_rss(root_pid: int) -> Optional[int]:
+    """Sums RSS (bytes) of root_pid and all its descendants."""
+    if not HAS_PROC:
+        return None
+    return sum(rss(pid) for pid in descendants(root_pid))
+
+
+def renderer_rss(root_pid: Optional[int] = None) -> Optional[int]:
+    """RSS (bytes) of the largest Chromium renderer process started below root_pid (default: this process)."""
+    if not HAS_PROC:
+        return None
+    largest = 0
+    for pid in descendants(root_pid or os.getpid()):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if b"--type=renderer" not in f.read():
+                    continue
+        except OSError:
+            continue
+        largest = max(largest, rss(pid))
+    return largest
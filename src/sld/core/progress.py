@@ -0,0 +1,137 @@
+import threading
+from typing import Dict, List, Optional
+
+
+class PenpalProgress:
+    def __init__(self, name: str):
+        self.name = name
+        self.total = 0
+        self.downloaded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.finished = False
+
+    @property
+    def done(self) -> int:
+        return self.downloaded + self.skipped + self.failed
+
+    def copy(self) -> "PenpalProgress":
+        clone = PenpalProgress(self.name)
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+
+class ProgressSnapshot:
+    def __init__(self, penpals: List[PenpalProgress], current: Optional[str], status: str, summaries: List[str]):
+        self.penpals = penpals
+        self.current = current
+        self.status = status
+        self.summaries = summaries
+
+    @property
+    def total(self) -> int:
+        return sum(p.total for p in self.penpals)
+
+    @property
+    def done(self) -> int:
+        return sum(p.done for p in self.penpals)
+
+
+class ProgressReporter:
+    """
+    Worker-side progress aggregator.
+    The download loop records events here as fast as it likes; the UI pulls one
+    coalesced snapshot per frame, so UI cost does not grow with event rate.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._penpals: Dict[str, PenpalProgress] = {}
+        self._current: Optional[str] = None
+        self._status = ""
+        self._summaries: List[str] = []
+        self._version = 0
+        self._seen_version = -1
+
+    def begin_run(self, names: List[str]):
+        with self._lock:
+            self._penpals = {name: PenpalProgress(name) for name in names}
+            self._current = None
+            self._status = ""
+            self._version += 1
+
+    def _entry(self, name: str) -> PenpalProgress:
+        entry = self._penpals.get(name)
+        if entry is None:
+            entry = self._penpals[name] = PenpalProgress(name)
+        return entry
+
+    def start_penpal(self, name: str):
+        with self._lock:
+            self._entry(name)
+            self._current = name
+            self._version += 1
+
+    def set_total(self, name: str, total: int):
+        with self._lock:
+            self._entry(name).total = total
+            self._version += 1
+
+    def letter_done(self, name: str, outcome: str):
+        """outcome is one of 'downloaded', 'skipped', 'failed'."""
+        with self._lock:
+            entry = self._entry(name)
+            setattr(entry, outcome, getattr(entry, outcome) + 1)
+            self._version += 1
+
+    def letter_recovered(self, name: str, outcome: str):
+        """A letter counted as failed succeeded on retry."""
+        with self._lock:
+            entry = self._entry(name)
+            entry.failed = max(0, entry.failed - 1)
+            setattr(entry, outcome, getattr(entry, outcome) + 1)
+            self._version += 1
+
+    def finish_penpal(self, name: str):
+        with self._lock:
+            entry = self._entry(name)
+            entry.finished = True
+            self._summaries.append(
+                f"Finished {name}: {entry.downloaded} downloaded, {entry.skipped} skipped, {entry.failed} failed."
+            )
+            self._version += 1
+
+    def set_status(self, status: str):
+        with self._lock:
+            self._status = status
+            self._version += 1
+
+    def add_summary(self, line: str):
+        with self._lock:
+            self._summaries.append(line)
+            self._version += 1
+
+    def totals(self) -> Dict[str, int]:
+        """Run totals, without consuming the snapshot state the UI polls."""
+        with self._lock:
+            entries = list(self._penpals.values())
+            return {
+                "penpals": len(entries),
+                "downloaded": sum(p.downloaded for p in entries),
+                "skipped": sum(p.skipped for p in entries),
+                "failed": sum(p.failed for p in entries),
+            }
+
+    def snapshot(self) -> Optional[ProgressSnapshot]:
+        """Returns the state since the last call, or None if nothing changed."""
+        with self._lock:
+            if self._version == self._seen_version:
+                return None
+            self._seen_version = self._version
+            summaries, self._summaries = self._summaries, []
+            return ProgressSnapshot(
+                [p.copy() for p in self._penpals.values()],
+                self._current,
+                self._status,
+                summaries,
+            )
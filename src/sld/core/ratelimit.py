@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from .metrics import metrics
+from ..config import config
+
+
+class RateGovernor:
+    """
+    Adaptive token bucket shared by every navigation and print.
+    Each action takes one token; tokens refill at `rate` per second. The rate
+    is cut sharply on HTTP 429/5xx (honouring Retry-After), reduced gently on
+    slow network actions (prints only take a token, since a slow render is local), and ramped back up additively while things are healthy
+    (AIMD), so runs settle near the highest rate the service tolerates.
+    """
+
+    def __init__(self, rate: float = 2.0, min_rate: float = 0.2, max_rate: float = 8.0,
+                 burst: float = 3.0, slow_seconds: float = 5.0, increase: float = 0.05):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.slow_seconds = slow_seconds
+        self.increase = increase
+        self.tokens = burst
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+        metrics.rate_limit.set(rate)
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _set_rate(self, rate: float):
+        self.rate = max(self.min_rate, min(self.max_rate, rate))
+        metrics.rate_limit.set(self.rate)
+
+    async def acquire(self):
+        """Waits for a token. Tokens are reserved up front, so waiters are served in order."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Rate-limits the enclosed action and adapts to how long it took; a failed action counts as slow."""
+        await self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.on_slow()
+            raise
+        if time.monotonic() - start > self.slow_seconds:
+            self.on_slow()
+        else:
+            self.on_success()
+
+    def on_success(self):
+        with self._lock:
+            if time.monotonic() >= self._cooldown_until and self.rate < self.max_rate:
+                self._set_rate(self.rate + self.increase)
+
+    def on_slow(self):
+        with self._lock:
+            self._set_rate(self.rate * 0.8)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._set_rate(self.rate * 0.5)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            # Push the bucket into debt so the next actions wait out the pause
+            self.tokens = min(self.tokens, -pause * self.rate)
+            self._cooldown_until = now + max(pause, 10.0)
+            self.throttled += 1
+        metrics.throttled.inc()
+
+    def share(self, fraction: float):
+        """Scales all rates to a fraction of the budget, for one of several worker processes."""
+        with self._lock:
+            self.min_rate *= fraction
+            self.max_rate *= fraction
+            self.burst = max(1.0, self.burst * fraction)
+            self.tokens = min(self.tokens, self.burst)
+            self._set_rate(self.rate * fraction)
+
+    def observe(self, status: int, retry_after: Optional[str] = None):
+        """Feeds an HTTP response status into the governor."""
+        if status == 429 or status >= 500:
+            try:
+                seconds = float(retry_after) if retry_after else None
+            except ValueError:
+                seconds = None
+            self.on_throttle(seconds)
+
+
+# Singleton instance
+governor = RateGovernor(
+    rate=config.get("rate_initial"),
+    min_rate=config.get("rate_min"),
+    max_rate=config.get("rate_max"),
+    slow_seconds=config.get("rate_slow_seconds"),
+)
@@ -0,0 +1,197 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from .metrics import metrics
+from .procinfo import HAS_PROC, descendants, rss
+from ..config import config
+
+
+class RenderGate:
+    """
+    Limits how many letters render at once, across every browser of a run.
+    The limit and the active count live in shared memory, so the gate works
+    the same for accounts on one event loop and for sharded worker processes
+    (pass the gate to the worker; it pickles through spawn).
+    """
+
+    POLL = 0.1
+
+    def __init__(self, limit: int):
+        ctx = multiprocessing.get_context("spawn")
+        self._limit = ctx.Value("i", max(1, limit), lock=False)
+        self._active = ctx.Value("i", 0, lock=False)
+        self._lock = ctx.Lock()
+
+    @property
+    def limit(self) -> int:
+        return self._limit.value
+
+    @limit.setter
+    def limit(self, value: int):
+        with self._lock:
+            self._limit.value = max(1, value)
+
+    @property
+    def active(self) -> int:
+        return self._active.value
+
+    def _try_acquire(self) -> bool:
+        with self._lock:
+            if self._active.value < self._limit.value:
+                self._active.value += 1
+                return True
+            return False
+
+    def _release(self):
+        with self._lock:
+            self._active.value -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        while not self._try_acquire():
+            await asyncio.sleep(self.POLL)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+# Gate used by this process's downloaders; None means renders are not limited
+_gate: Optional[RenderGate] = None
+
+
+def install_gate(gate: Optional[RenderGate]):
+    global _gate
+    _gate = gate
+
+
+def current_gate() -> Optional[RenderGate]:
+    return _gate
+
+
+@asynccontextmanager
+async def render_slot():
+    """Holds a render slot if a gate is installed (a no-op otherwise)."""
+    if _gate is None:
+        yield
+        return
+    async with _gate.slot():
+        yield
+
+
+def _meminfo() -> Dict[str, int]:
+    values = {}
+    with open("/proc/meminfo") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            values[key] = int(rest.split()[0]) * 1024
+    return values
+
+
+def _cpu_ticks(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            fields = f.read().decode(errors="replace").rsplit(")", 1)[1].split()
+        # utime and stime are fields 14 and 15; fields[0] here is field 3
+        return int(fields[11]) + int(fields[12])
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class ResourceGovernor:
+    """
+    Samples RSS and CPU of this process tree (Python plus every Chromium it
+    started) through /proc and moves the render gate's limit between 1 and
+    max_slots: down one step while memory or CPU is above 90% of its limit,
+    down to 1 at once when system free memory falls below min_free (before
+    the OOM killer would act), and up one step while both are below 70%.
+    Does nothing where /proc is unavailable.
+    """
+
+    def __init__(self, gate: RenderGate, max_slots: int, max_rss: int, max_cpu: float,
+                 min_free: int, interval: float = 2.0):
+        self.gate = gate
+        self.max_slots = max(1, max_slots)
+        self.max_rss = max_rss
+        self.max_cpu = max_cpu
+        self.min_free = min_free
+        self.interval = interval
+        self.rss = 0
+        self.cpu = 0.0
+        self._ticks: Dict[int, int] = {}
+        self._sampled = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, gate: RenderGate, max_slots: int) -> "ResourceGovernor":
+        max_rss_mb = config.get("max_chromium_rss_mb") or 0
+        if not max_rss_mb and HAS_PROC:
+            max_rss_mb = _meminfo()["MemTotal"] * 0.75 / (1024 * 1024)
+        return cls(
+            gate,
+            max_slots,
+            max_rss=int(max_rss_mb * 1024 * 1024),
+            max_cpu=config.get("max_cpu_percent") or 90,
+            min_free=(config.get("min_free_mb") or 300) * 1024 * 1024,
+        )
+
+    def sample(self) -> Optional[Dict]:
+        """One measurement of the process tree; returns {rss, cpu, free} or None without /proc."""
+        if not HAS_PROC:
+            return None
+        now = time.monotonic()
+        pids = descendants(os.getpid())
+        self.rss = sum(rss(pid) for pid in pids)
+
+        ticks = {pid: _cpu_ticks(pid) for pid in pids}
+        if self._sampled:
+            # Processes that exited since the last sample simply drop out
+            used = sum(max(0, t - self._ticks.get(pid, 0)) for pid, t in ticks.items())
+            seconds = (now - self._sampled) * (os.cpu_count() or 1)
+            self.cpu = 100.0 * used / os.sysconf("SC_CLK_TCK") / seconds
+        self._ticks = ticks
+        self._sampled = now
+        return {"rss": self.rss, "cpu": self.cpu, "free": _meminfo().get("MemAvailable", 0)}
+
+    def adjust(self, sample: Dict):
+        limit = self.gate.limit
+        if sample["free"] < self.min_free:
+            if limit > 1:
+                print(f"Low memory ({sample['free'] // (1024 * 1024)} MB free): rendering one letter at a time")
+            limit = 1
+        elif sample["rss"] > self.max_rss * 0.9 or sample["cpu"] > self.max_cpu * 0.9:
+            limit -= 1
+        elif sample["rss"] < self.max_rss * 0.7 and sample["cpu"] < self.max_cpu * 0.7:
+            limit += 1
+        self.gate.limit = min(self.max_slots, max(1, limit))
+        metrics.render_slots.set(self.gate.limit)
+        metrics.chromium_rss.set(sample["rss"])
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                sample = self.sample()
+                if sample:
+                    self.adjust(sample)
+            except Exception as e:
+                print(f"Resource governor error: {e}")
+
+    def start(self):
+        if not HAS_PROC or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="resource-governor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
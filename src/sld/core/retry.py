@@ -0,0 +1,110 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+
+class RenderError(Exception):
+    """Printing a letter to PDF failed."""
+
+
+# error class -> (first delay in seconds, max attempts including the first)
+BACKOFF: Dict[str, Tuple[float, int]] = {
+    "timeout": (5.0, 4),
+    "navigation": (15.0, 3),
+    "render": (2.0, 3),
+    "other": (5.0, 2),
+}
+
+
+def classify(error: BaseException) -> str:
+    if isinstance(error, PlaywrightTimeoutError):
+        return "timeout"
+    if isinstance(error, RenderError):
+        return "render"
+    message = str(error)
+    if "net::" in message or "Navigation" in message or "Target" in message:
+        return "navigation"
+    return "other"
+
+
+class FailedLetter:
+    def __init__(self, penpal: str, letter_number: int, error_class: str, message: str, attempts: int = 1):
+        self.penpal = penpal
+        self.letter_number = letter_number
+        self.error_class = error_class
+        self.message = message
+        self.attempts = attempts
+        self.last_attempt = time.time()
+        base, _ = BACKOFF.get(error_class, BACKOFF["other"])
+        self.next_at = time.monotonic() + base * 2 ** (attempts - 1)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.attempts >= BACKOFF.get(self.error_class, BACKOFF["other"])[1]
+
+    def to_dict(self) -> Dict:
+        return {
+            "penpal": self.penpal,
+            "letter": self.letter_number,
+            "error_class": self.error_class,
+            "error": self.message,
+            "attempts": self.attempts,
+            "last_attempt": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.last_attempt)),
+        }
+
+
+class RetryQueue:
+    """
+    Letters that failed during the main sweep, retried in a final pass with
+    per-error-class exponential backoff. Anything still failing is written
+    to a JSON report.
+    """
+
+    def __init__(self):
+        self.pending: List[FailedLetter] = []
+        self.failed: List[FailedLetter] = []
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def add(self, penpal: str, letter_number: int, error: BaseException, attempts: int = 1) -> FailedLetter:
+        message = str(error).splitlines()[0] if str(error) else type(error).__name__
+        item = FailedLetter(penpal, letter_number, classify(error), message, attempts)
+        if item.exhausted:
+            self.failed.append(item)
+        else:
+            self.pending.append(item)
+        return item
+
+    def requeue(self, item: FailedLetter):
+        """Puts back an item that was taken but not attempted, keeping its attempt count."""
+        self.pending.append(item)
+
+    def take(self) -> Dict[str, List[FailedLetter]]:
+        """Removes all pending items, grouped by penpal and ordered by due time."""
+        batch = sorted(self.pending, key=lambda item: item.next_at)
+        self.pending = []
+        grouped: Dict[str, List[FailedLetter]] = {}
+        for item in batch:
+            grouped.setdefault(item.penpal, []).append(item)
+        return grouped
+
+    def write_report(self, path: Path) -> Optional[Path]:
+        """
+        Writes the still-failed letters to path, along with any still pending
+        (a stopped run), or removes a stale report if there are none.
+        """
+        items = self.failed + self.pending
+        if not items:
+            if path.exists():
+                path.unlink()
+            return None
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([item.to_dict() for item in items], f, indent=4)
+        os.replace(tmp_path, path)
+        return path
@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .backup import format_summary, run_backups
+from .metrics import exporter
+from .tracing import traced_run
+from ..config import config
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:  # Windows
+    import msvcrt
+
+# Longest single sleep; bounds drift after the machine suspends
+MAX_SLEEP = 15 * 60
+# Wait before retrying when another process holds the run lock
+BUSY_RETRY = 5 * 60
+
+
+def _timestamp(t: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t))
+
+
+class RunLock:
+    """
+    Cross-process lock, so a scheduled sync, a manual backup, the GUI and a
+    second daemon never run at the same time (they would share Chrome
+    profiles). Uses an OS file lock held for the whole run: the OS drops it
+    when the holder exits, even after a crash, so there is no stale lock to
+    take over.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    @classmethod
+    def default(cls) -> "RunLock":
+        """The lock shared by every kind of run."""
+        return cls(config.user_data_dir / "sync.lock")
+
+    def acquire(self) -> bool:
+        f = open(self.path, "a+")
+        try:
+            if msvcrt:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if msvcrt:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class SyncScheduler:
+    """
+    Runs an incremental backup every interval. Between runs nothing is
+    running but one sleeping thread: the browser is started for a run and
+    closed after it, and metrics are only exported while a run is active.
+    A run that overlaps the next slot is followed by a single catch-up run,
+    not one per missed slot. Each run is appended to sync_history.jsonl.
+    """
+
+    def __init__(self, account_names: Optional[List[str]] = None, interval_minutes: float = 1440,
+                 headless: bool = True, workers: Optional[int] = None):
+        self.account_names = account_names
+        self.interval = interval_minutes * 60
+        self.headless = headless
+        self.workers = workers
+        self.state_path = config.user_data_dir / "sync_state.json"
+        self.history_path = config.user_data_dir / "sync_history.jsonl"
+        self.lock = RunLock.default()
+        self.state = self._load_state()
+        self._retry_at = 0.0
+        self._stop = threading.Event()
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error loading sync state: {e}")
+            return {}
+
+    def _save_state(self):
+        tmp_path = self.state_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=4)
+        os.replace(tmp_path, self.state_path)
+
+    def next_due(self) -> float:
+        """Unix time of the next run, counted from the start of the last one."""
+        due = self.state.get("last_started", 0) + self.interval
+        return max(due, self._retry_at)
+
+    def run_if_due(self, force: bool = False) -> Optional[Dict]:
+        """Runs a sync if one is due (or force). Returns the run record, or None if nothing ran."""
+        if not force and time.time() < self.next_due():
+            return None
+        if not self.lock.acquire():
+            print("Another sync or backup is running; skipping this one.")
+            self._retry_at = time.time() + BUSY_RETRY
+            return None
+        try:
+            return self._run()
+        finally:
+            self.lock.release()
+
+    def _run(self) -> Dict:
+        started = time.time()
+        self.state["last_started"] = started
+        self._save_state()
+        names = self.account_names or config.account_names()
+        print(f"Sync started at {_timestamp(started)} for {', '.join(names)}")
+
+        record = {"started": _timestamp(started), "accounts": [], "error": None}
+        if config.get("metrics_enabled"):
+            exporter.start()
+        try:
+            accounts = [config.get_account(name) for name in names]
+            with traced_run():
+                record["accounts"] = run_backups(accounts, headless=self.headless, workers=self.workers)
+        except Exception as e:
+            record["error"] = str(e)
+            print(f"Sync failed: {e}")
+        finally:
+            if config.get("metrics_enabled"):
+                exporter.stop()
+
+        finished = time.time()
+        record["finished"] = _timestamp(finished)
+        record["seconds"] = round(finished - started, 1)
+        for summary in record["accounts"]:
+            print(format_summary(summary))
+        try:
+            with open(self.history_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except Exception as e:
+            print(f"Error writing sync history: {e}")
+
+        self.state["last_finished"] = finished
+        self.state["last_ok"] = record["error"] is None and not any(s["error"] for s in record["accounts"])
+        self._save_state()
+        return record
+
+    def run_forever(self):
+        print(f"Syncing every {self.interval / 60:g} minutes; next run at {_timestamp(max(self.next_due(), time.time()))}.")
+        try:
+            while not self._stop.is_set():
+                delay = self.next_due() - time.time()
+                if delay > 0:
+                    self._stop.wait(min(delay, MAX_SLEEP))
+                    continue
+                if self.run_if_due():
+                    print(f"Next run at {_timestamp(self.next_due())}.")
+        except KeyboardInterrupt:
+            print("Sync stopped.")
+
+    def stop(self):
+        self._stop.set()
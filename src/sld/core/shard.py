@@ -0,0 +1,246 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .metrics import metrics
+from .progress import ProgressReporter
+from .resources import current_gate
+from .tracing import traced_run
+from .utils import sanitize_filename
+from ..config import Account, config
+
+# Profile files that must not be copied into a worker profile (locks, caches)
+PROFILE_IGNORE = shutil.ignore_patterns("Singleton*", "lockfile", "*Cache*", "Crashpad", "*.log")
+
+
+class ProgressChannel:
+    """
+    Worker-side stand-in for ProgressReporter: every event is forwarded to the
+    coordinator over a multiprocessing queue and applied to the real reporter there.
+    """
+
+    EVENTS = ("start_penpal", "set_total", "letter_done", "letter_recovered",
+              "finish_penpal", "set_status", "add_summary")
+
+    def __init__(self, events, worker_id: int):
+        self.events = events
+        self.worker_id = worker_id
+
+    def __getattr__(self, name: str):
+        if name not in self.EVENTS:
+            raise AttributeError(name)
+        return lambda *args: self.events.put((self.worker_id, name, args))
+
+
+def group_penpals(names: List[str]) -> List[List[str]]:
+    """
+    Groups penpals whose names map to the same folder, so one worker owns each
+    folder and the "name (1)", "name (2)" allocation stays consistent.
+    """
+    groups: Dict[str, List[str]] = {}
+    for name in names:
+        groups.setdefault(sanitize_filename(name).lower(), []).append(name)
+    return list(groups.values())
+
+
+def worker_profile(profile_path: Path, worker_id: int) -> Path:
+    """Copies the logged-in profile for one worker; Chrome can't share a profile between processes."""
+    target = profile_path.parent / f"{profile_path.name}.worker{worker_id}"
+    shutil.rmtree(target, ignore_errors=True)
+    shutil.copytree(profile_path, target, ignore=PROFILE_IGNORE)
+    return target
+
+
+async def _run_worker(worker_id: int, workers: int, account: Account, profile_path: Path,
+                      tasks, events, headless: bool, gate=None):
+    from .browser import BrowserEngine
+    from .downloader import LetterDownloader
+    from .ratelimit import governor
+    from .resources import install_gate
+
+    # Renders are limited across all workers by the coordinator's governor
+    install_gate(gate)
+    # The rate budget is per account, not per process
+    governor.share(1 / workers)
+    engine = BrowserEngine(profile_path=profile_path)
+    downloader = LetterDownloader(engine, download_path=account.download_path)
+    if downloader.archive_mode == "account":
+        # One writer per archive: each worker owns whole penpals, so archive per penpal
+        downloader.archive_mode = "penpal"
+    downloader.capture_writer = f"worker{worker_id}"
+    progress = ProgressChannel(events, worker_id)
+    sent = metrics.counter_values()
+
+    def flush_metrics():
+        nonlocal sent
+        values = metrics.counter_values()
+        events.put((worker_id, "metrics", ({k: v - sent.get(k, 0) for k, v in values.items()},)))
+        sent = values
+
+    try:
+        await engine.start(headless=headless)
+        available = await downloader.get_penpals()
+        downloader.begin_run()
+        while True:
+            group = tasks.get()
+            if group is None:
+                break
+            for name in group:
+                if name not in available:
+                    progress.add_summary(f"{name} not found in worker {worker_id}")
+                    continue
+                try:
+                    await downloader.process_penpal(name, progress=progress)
+                    metrics.penpals_completed.inc()
+                except Exception as e:
+                    metrics.penpals_failed.inc()
+                    progress.add_summary(f"Error downloading {name}: {e}")
+            flush_metrics()
+
+        report = account.download_path / f".failed_letters.worker{worker_id}.json"
+        await downloader.retry_failed(progress, report_path=report)
+        flush_metrics()
+        events.put((worker_id, "done", (None,)))
+    except Exception as e:
+        events.put((worker_id, "done", (str(e),)))
+    finally:
+        await engine.close()
+
+
+def _worker_main(worker_id: int, workers: int, account: Account, profile_path: Path,
+                 tasks, events, headless: bool, gate=None):
+    with traced_run(f".worker{worker_id}"):
+        asyncio.run(_run_worker(worker_id, workers, account, profile_path, tasks, events, headless, gate))
+
+
+def _merge_reports(download_path: Path, workers: int) -> Optional[Path]:
+    """Combines the per-worker failure reports into failed_letters.json."""
+    failed: List[Dict] = []
+    for worker_id in range(workers):
+        part = download_path / f".failed_letters.worker{worker_id}.json"
+        if part.exists():
+            try:
+                failed.extend(json.loads(part.read_text(encoding="utf-8")))
+            except Exception as e:
+                print(f"Error reading {part}: {e}")
+            part.unlink()
+
+    path = download_path / "failed_letters.json"
+    if not failed:
+        if path.exists():
+            path.unlink()
+        return None
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(failed, f, indent=4)
+    os.replace(tmp_path, path)
+    return path
+
+
+async def _list_penpals(account: Account, headless: bool) -> List[str]:
+    from .browser import BrowserEngine
+    from .downloader import LetterDownloader
+
+    engine = BrowserEngine(profile_path=account.profile_path)
+    try:
+        await engine.start(headless=headless)
+        return list(await LetterDownloader(engine, account.download_path).get_penpals())
+    finally:
+        await engine.close()
+
+
+def backup_sharded(account: Account, penpals: Optional[List[str]] = None, workers: Optional[int] = None,
+                   headless: bool = True, progress: Optional[ProgressReporter] = None,
+                   log: Callable[[str], None] = print) -> Dict:
+    """
+    Backs up one account with several worker processes, each running its own
+    browser on a copy of the account's profile. Workers pull groups of penpals
+    from a shared queue, so large and small penpals balance out, and report
+    progress and metrics back to this process. Returns the same summary as
+    backup_account().
+    """
+    progress = progress or ProgressReporter()
+    summary = {"account": account.name, "penpals": 0, "downloaded": 0, "skipped": 0, "failed": 0,
+               "seconds": 0.0, "error": None}
+    started = time.monotonic()
+
+    available = asyncio.run(_list_penpals(account, headless))
+    names = [name for name in (penpals or available) if name in available]
+    if not available:
+        summary["error"] = "No pen pals found (not logged in? run the login command for this account)"
+        log(f"[{account.name}] Backup failed: {summary['error']}")
+        return summary
+
+    if not names:
+        return summary
+
+    groups = group_penpals(names)
+    workers = max(1, min(workers or config.get("workers") or 1, len(groups)))
+    log(f"[{account.name}] {len(names)} pen pals across {workers} worker(s)")
+    progress.begin_run(names)
+    account.download_path.mkdir(parents=True, exist_ok=True)
+
+    # spawn, not fork: Playwright's event loop and threads don't survive a fork
+    ctx = multiprocessing.get_context("spawn")
+    tasks, events = ctx.Queue(), ctx.Queue()
+    for group in groups:
+        tasks.put(group)
+    for _ in range(workers):
+        tasks.put(None)
+
+    processes = []
+    for worker_id in range(workers):
+        profile = worker_profile(account.profile_path, worker_id)
+        process = ctx.Process(target=_worker_main, name=f"sld-worker-{worker_id}",
+                              args=(worker_id, workers, account, profile, tasks, events, headless,
+                                    current_gate()))
+        process.start()
+        processes.append(process)
+
+    running = set(range(workers))
+    errors = []
+    try:
+        while running:
+            try:
+                worker_id, event, args = events.get(timeout=1)
+            except queue.Empty:
+                # A worker that died without reporting (crash, OOM kill) must not hang the run
+                for worker_id in list(running):
+                    if not processes[worker_id].is_alive():
+                        running.discard(worker_id)
+                        errors.append(f"worker {worker_id} exited with code {processes[worker_id].exitcode}")
+                continue
+
+            if event == "done":
+                running.discard(worker_id)
+                if args[0]:
+                    errors.append(f"worker {worker_id}: {args[0]}")
+            elif event == "metrics":
+                metrics.add_counts(args[0])
+            else:
+                if event == "add_summary":
+                    log(f"[{account.name}] {args[0]}")
+                getattr(progress, event)(*args)
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+
+    report = _merge_reports(account.download_path, workers)
+    if report:
+        progress.add_summary(f"Some letters still failed; see {report}")
+    if errors:
+        summary["error"] = "; ".join(errors)
+        log(f"[{account.name}] {summary['error']}")
+    summary.update(progress.totals())
+    summary["seconds"] = round(time.monotonic() - started, 1)
+    return summary
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Set
+
+from ..config import config
+
+
+class StorageBackend(ABC):
+    """
+    Where finished files end up. The downloader always renders into its local
+    download folder first; put() then hands each file to the backend under a
+    key relative to that folder (e.g. "Anna/letter_3_Anna.pdf").
+    put(), list(), flush() and close() are coroutines so that waiting on the backend
+    never blocks the event loop other accounts run on.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.failed: List[str] = []
+
+    @abstractmethod
+    async def put(self, local_path: Path, key: str, keep_local: bool = False):
+        """Stores the file under key; keep_local keeps the local copy even if the backend would remove it."""
+
+    @abstractmethod
+    async def list(self, prefix: str) -> Set[str]:
+        """Keys under prefix, with the prefix removed."""
+
+    async def flush(self):
+        """Waits until every put() has finished."""
+
+    async def close(self):
+        await self.flush()
+
+
+class LocalStorage(StorageBackend):
+    """Files stay where they were rendered; the original behaviour."""
+
+    name = "local"
+
+    def __init__(self, root: Path):
+        super().__init__()
+        self.root = root
+
+    async def put(self, local_path: Path, key: str, keep_local: bool = False):
+        pass
+
+    async def list(self, prefix: str) -> Set[str]:
+        try:
+            with os.scandir(self.root / prefix) as entries:
+                return {entry.name for entry in entries}
+        except FileNotFoundError:
+            return set()
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-compatible object storage (AWS, MinIO, ...). Uploads run in the
+    background on a bounded pool: at most max_uploads files are in flight and
+    put() waits (without blocking the event loop) once twice that many are
+    queued, so a fast download can't pile up unbounded local files. Large files use multipart uploads of part_size.
+    Credentials come from the usual AWS environment variables or profile.
+    """
+
+    name = "s3"
+    POLL = 0.05
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, max_uploads: int = 4, part_size: int = 8 * 1024 * 1024,
+                 keep_local: bool = False):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError:
+            raise RuntimeError("The S3 storage backend needs boto3 (pip install boto3)")
+
+        super().__init__()
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.keep_local = keep_local
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None)
+        self.transfer = TransferConfig(multipart_threshold=part_size, multipart_chunksize=part_size,
+                                       max_concurrency=2)
+        self._pool = ThreadPoolExecutor(max_workers=max_uploads, thread_name_prefix="s3-upload")
+        self._slots = threading.BoundedSemaphore(max_uploads * 2)
+        self._pending: Set[Future] = set()
+        self._lock = threading.Lock()
+
+    def _upload(self, local_path: Path, key: str, keep_local: bool):
+        try:
+            self.client.upload_file(str(local_path), self.bucket, self.prefix + key, Config=self.transfer)
+            if not (keep_local or self.keep_local):
+                local_path.unlink()
+        except Exception as e:
+            print(f"Error uploading {key} to s3://{self.bucket}/{self.prefix}: {e}")
+            self.failed.append(key)
+        finally:
+            self._slots.release()
+
+    async def put(self, local_path: Path, key: str, keep_local: bool = False):
+        # The semaphore is released by upload threads, so poll it rather than block the loop
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(self.POLL)
+        future = self._pool.submit(self._upload, local_path, key, keep_local)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _list(self, full_prefix: str) -> Set[str]:
+        names = set()
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=full_prefix):
+            for item in page.get("Contents", []):
+                names.add(item["Key"][len(full_prefix):])
+        return names
+
+    async def list(self, prefix: str) -> Set[str]:
+        # Listing a large prefix takes many requests; keep them off the event loop
+        full_prefix = self.prefix + prefix.strip("/") + "/"
+        return await asyncio.get_running_loop().run_in_executor(None, self._list, full_prefix)
+
+    async def flush(self):
+        with self._lock:
+            pending = list(self._pending)
+        if pending:
+            await asyncio.gather(*(asyncio.wrap_future(future) for future in pending))
+
+    async def close(self):
+        await self.flush()
+        self._pool.shutdown(wait=False)
+
+
+def create_storage(root: Path) -> StorageBackend:
+    """
+    Builds the backend selected by the storage_backend setting. Remote keys
+    start with the download folder's name, so accounts don't collide.
+    """
+    backend = config.get("storage_backend") or "local"
+    if backend == "local":
+        return LocalStorage(root)
+    if backend == "s3":
+        return S3Storage(
+            bucket=config.get("s3_bucket"),
+            prefix="/".join(p for p in (config.get("s3_prefix"), root.name) if p),
+            endpoint_url=config.get("s3_endpoint_url"),
+            region=config.get("s3_region"),
+            max_uploads=config.get("s3_max_uploads") or 4,
+            part_size=(config.get("s3_part_size_mb") or 8) * 1024 * 1024,
+            keep_local=bool(config.get("s3_keep_local")),
+        )
+    raise ValueError(f"Unknown storage backend '{backend}'")
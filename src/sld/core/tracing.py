@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import config
+
+
+class _NullSpan:
+    """Shared no-op context manager returned while tracing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Collects timed spans and exports them as Chrome trace-event JSON
+    (loadable in Perfetto or chrome://tracing).
+    Spans are "complete" events (ph: X); each asyncio task gets its own lane
+    so concurrent work stays properly nested.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.events: List[Dict[str, Any]] = []
+        self._lanes: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        with self._lock:
+            self.events = []
+            self._lanes = {}
+            self._origin = time.perf_counter()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def _lane(self) -> int:
+        try:
+            key = id(asyncio.current_task())
+        except RuntimeError:
+            key = threading.get_ident()
+        lane = self._lanes.get(key)
+        if lane is None:
+            with self._lock:
+                lane = self._lanes.setdefault(key, len(self._lanes) + 1)
+        return lane
+
+    def span(self, name: str, **args: Any):
+        """Times the enclosed block. Costs one attribute check when disabled."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, args)
+
+    @contextmanager
+    def _span(self, name: str, args: Dict[str, Any]):
+        lane = self._lane()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            event = {
+                "name": name,
+                "cat": "sld",
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": lane,
+                "args": args,
+            }
+            with self._lock:
+                self.events.append(event)
+
+    def export(self, path: Optional[Path] = None, label: str = "") -> Optional[Path]:
+        """
+        Writes collected spans to a trace file (by default traces/trace-<time><label>.json
+        in the app data folder). Returns the path, or None if empty.
+        """
+        with self._lock:
+            events = list(self.events)
+        if not events:
+            return None
+
+        if path is None:
+            trace_dir = config.user_data_dir / "traces"
+            trace_dir.mkdir(parents=True, exist_ok=True)
+            path = trace_dir / f"trace-{time.strftime('%Y%m%d-%H%M%S')}{label}.json"
+
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": lane,
+             "args": {"name": f"task {lane}"}}
+            for lane in sorted(set(self._lanes.values()))
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        return path
+
+
+# Singleton instance
+tracer = Tracer()
+
+
+@contextmanager
+def traced_run(label: str = ""):
+    """
+    Traces the enclosed run if trace_enabled is set, and exports the trace
+    when it ends, even if it failed. Used by the CLI, the daemon and shard
+    workers (each worker process writes its own file, marked by label).
+    """
+    if not config.get("trace_enabled"):
+        yield
+        return
+    tracer.enable()
+    try:
+        yield
+    finally:
+        tracer.disable()
+        trace_path = tracer.export(label=label)
+        if trace_path:
+            print(f"Trace written to {trace_path}")
@@ -1,6 +1,9 @@
+import os
 import re
+import threading
 import unicodedata
 from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
 
 def sanitize_filename(filename: str) -> str:
     """
@@ -28,20 +31,127 @@ def sanitize_filename(filename: str) -> str:
         
     return filename
 
-def ensure_unique_path(path: Path) -> Path:
+class DirectoryIndex:
     """
-    If path exists, appends (1), (2), etc. to the filename to make it unique.
+    In-memory index of one directory's entry names, loaded with a single
+    scandir. Hands out unique names without stat-probing the filesystem and
+    is shared (per directory) between parallel tasks, so two workers can
+    never be given the same name. Names are compared case-insensitively
+    when allocating (as shard.group_penpals does), so "Anna" and "anna"
+    never share a folder on Windows or macOS.
     """
-    if not path.exists():
-        return path
-        
-    parent = path.parent
-    stem = path.stem
-    suffix = path.suffix
-    
-    counter = 1
-    while True:
-        new_path = parent / f"{stem} ({counter}){suffix}"
-        if not new_path.exists():
-            return new_path
-        counter += 1
+    _registry: Dict[Path, "DirectoryIndex"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._next: Dict[Tuple[str, str], int] = {}
+        # Owner of each name as far as known (None: unclaimed), and each owner's name per base
+        self._owners: Dict[str, Optional[str]] = {}
+        self._claims: Dict[Tuple[str, str, str], str] = {}
+        # Per base name: how many leading candidates are already claimed by an owner
+        self._skipped: Dict[Tuple[str, str], int] = {}
+        self.names: Set[str] = set()
+        # Lowercased name -> name as on disk
+        self._folded: Dict[str, str] = {}
+        self.refresh()
+
+    @classmethod
+    def for_dir(cls, path: Path, refresh: bool = False) -> "DirectoryIndex":
+        key = Path(os.path.abspath(path))
+        with cls._registry_lock:
+            index = cls._registry.get(key)
+            if index is None:
+                index = cls._registry[key] = cls(key)
+                return index
+        if refresh:
+            index.refresh()
+        return index
+
+    def refresh(self):
+        """Reloads the index from disk (one scandir) and forgets cached ownership."""
+        try:
+            with os.scandir(self.path) as entries:
+                names = {entry.name for entry in entries}
+        except FileNotFoundError:
+            names = set()
+        with self._lock:
+            self.names = names
+            self._folded = {name.lower(): name for name in names}
+            self._next.clear()
+            self._owners.clear()
+            self._claims.clear()
+            self._skipped.clear()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names
+
+    def add(self, name: str):
+        with self._lock:
+            self.names.add(name)
+            self._folded.setdefault(name.lower(), name)
+
+    def discard(self, name: str):
+        with self._lock:
+            self.names.discard(name)
+            if self._folded.get(name.lower()) == name:
+                del self._folded[name.lower()]
+
+    def allocate(self, name: str, owner: Optional[str] = None,
+                 owner_of: Optional[Callable[[str], Optional[str]]] = None, split_suffix: bool = True) -> Path:
+        """
+        Reserves and returns a free path for name, appending (1), (2), etc.
+        With an owner, a candidate already claimed by the same owner (in this
+        process, or on disk per owner_of(candidate), where None means
+        unclaimed) is returned as-is instead of being skipped. Numbering
+        resumes where it stopped for the base name, and each existing
+        candidate's owner is looked up at most once until refresh().
+        Use split_suffix=False for directory names.
+        """
+        stem, suffix = os.path.splitext(name) if split_suffix else (name, "")
+        key = (stem.lower(), suffix.lower())
+
+        def candidate_name(number: int) -> str:
+            return name if number == 0 else f"{stem} ({number}){suffix}"
+
+        with self._lock:
+            if owner is None:
+                candidate = name
+                if candidate.lower() in self._folded:
+                    counter = self._next.get(key, 1)
+                    while candidate_name(counter).lower() in self._folded:
+                        counter += 1
+                    candidate = candidate_name(counter)
+                    self._next[key] = counter + 1
+                self.names.add(candidate)
+                self._folded[candidate.lower()] = candidate
+                return self.path / candidate
+
+            claimed = self._claims.get(key + (owner,))
+            if claimed is not None:
+                return self.path / claimed
+
+            number = self._skipped.get(key, 0)
+            while True:
+                candidate = candidate_name(number)
+                existing = self._folded.get(candidate.lower())
+                if existing is None:
+                    break
+                if existing not in self._owners:
+                    found = self._owners[existing] = owner_of(existing) if owner_of else ""
+                    if found:
+                        self._claims.setdefault(key + (found,), existing)
+                if self._owners[existing] in (None, owner):
+                    # Reuse the folder under the spelling it has on disk
+                    candidate = existing
+                    break
+                # Claimed by another owner: later calls for this base start after it
+                number += 1
+                if number - 1 == self._skipped.get(key, 0):
+                    self._skipped[key] = number
+            self.names.add(candidate)
+            self._folded[candidate.lower()] = candidate
+            self._owners[candidate] = owner
+            self._claims[key + (owner,)] = candidate
+        return self.path / candidate
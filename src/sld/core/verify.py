@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .archive import LetterArchive
+from .dedup import read_letter_number
+from .manifest import PenpalManifest
+from .utils import DirectoryIndex
+from ..config import config
+
+HASH_CHUNK = 1024 * 1024
+TAIL_CHECK = 1024
+
+
+def file_sha256(path: Path, offset: int = 0, length: Optional[int] = None) -> str:
+    """SHA-256 of a file, or of length bytes at offset (an archive member), read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        while remaining is None or remaining > 0:
+            chunk = f.read(HASH_CHUNK if remaining is None else min(HASH_CHUNK, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def checksum_fields(path: Path) -> Dict:
+    """The manifest fields verify() checks against: sha256, size and mtime."""
+    stat = path.stat()
+    return {"sha256": file_sha256(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _looks_complete(path: str, offset: int, length: int) -> bool:
+    """A PDF truncated mid-write has no %%EOF marker near its end."""
+    with open(path, "rb") as f:
+        f.seek(offset + max(0, length - TAIL_CHECK))
+        return b"%%EOF" in f.read(min(length, TAIL_CHECK))
+
+
+def _hash_job(path: str, offset: int, length: int, check_tail: bool) -> Tuple[str, bool]:
+    complete = _looks_complete(path, offset, length) if check_tail else True
+    return file_sha256(Path(path), offset, length), complete
+
+
+class _Letter:
+    def __init__(self, manifest: PenpalManifest, number: str, entry: Dict, path: Path,
+                 offset: int = 0, size: int = 0, archive: Optional[LetterArchive] = None, member: str = ""):
+        self.manifest = manifest
+        self.number = number
+        self.entry = entry
+        self.path = path
+        self.offset = offset
+        self.size = size
+        self.archive = archive
+        self.member = member
+
+    def describe(self) -> str:
+        return f"{self.archive.path}:{self.member}" if self.archive else str(self.path)
+
+
+def _penpal_dirs(root: Path) -> Iterable[Path]:
+    """Penpal folders under root: with a manifest, or with PDFs saved before manifests existed."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if not entry.is_dir() or entry.name.startswith((".", "_")):
+                continue
+            if os.path.exists(os.path.join(entry.path, PenpalManifest.FILENAME)):
+                yield Path(entry.path)
+            elif any(name.lower().endswith(".pdf") for name in os.listdir(entry.path)):
+                yield Path(entry.path)
+
+
+def _unrecorded_number(path: Path) -> Optional[int]:
+    """Letter number of a PDF missing from the manifest, from its name or its /Letter metadata."""
+    match = re.match(r"letter_(\d+)_", path.name)
+    if match:
+        return int(match.group(1))
+    try:
+        return read_letter_number(path)
+    except Exception:
+        return None
+
+
+def _requeue(letter: _Letter):
+    """Moves a bad letter out of the way and forgets it, so the next download run fetches it again."""
+    penpal_dir = letter.manifest.path.parent
+    if letter.archive:
+        letter.archive.forget(letter.member)
+    elif letter.path.exists():
+        os.replace(letter.path, letter.path.with_name(letter.path.name + ".corrupt"))
+        DirectoryIndex.for_dir(penpal_dir).discard(letter.path.name)
+    letter.manifest.forget(letter.number)
+
+
+def verify_tree(root: Path, full: bool = False, workers: Optional[int] = None, requeue: bool = True,
+                progress_callback: Optional[Callable] = None) -> Dict:
+    """
+    Checks every letter recorded in the penpal manifests under root.
+    Letters whose size and mtime still match the manifest are trusted
+    without reading them (unless full); the rest are hashed in parallel and
+    compared with the SHA-256 recorded at download time. Letters downloaded
+    before checksums existed are checked for a PDF end marker and adopted,
+    and so are PDFs in a penpal folder that the manifest doesn't list at all
+    (saved before manifests existed).
+    Failed letters are set aside and dropped from the manifest so the next
+    download run fetches them again (requeue=False only reports).
+    Returns {letters, unchanged, hashed, adopted, remote, failed: [...]}, also
+    written to verify_report.json under root.
+    """
+    report = {"letters": 0, "unchanged": 0, "hashed": 0, "adopted": 0, "remote": 0, "failed": []}
+    # With remote storage, local copies are removed after upload
+    remote = (config.get("storage_backend") or "local") != "local"
+    manifests = [PenpalManifest(penpal_dir) for penpal_dir in _penpal_dirs(root)]
+    to_hash: List[_Letter] = []
+    bad: List[Tuple[_Letter, str]] = []
+
+    for manifest in manifests:
+        penpal_dir = manifest.path.parent
+        recorded = {entry.get("file") for entry in manifest.letters.values()}
+        for name in sorted(os.listdir(penpal_dir)):
+            if name in recorded or not name.lower().endswith(".pdf"):
+                continue
+            path = penpal_dir / name
+            number = _unrecorded_number(path)
+            entry = {"file": name}
+            if number is not None and str(number) not in manifest.letters:
+                # Hashed below without a checksum: adopted if complete, set aside if truncated
+                manifest.letters[str(number)] = entry
+            else:
+                # Unknown or already recorded number: checked, but never recorded or forgotten
+                report["letters"] += 1
+                to_hash.append(_Letter(manifest, None, entry, path, 0, path.stat().st_size))
+
+        for number, entry in list(manifest.letters.items()):
+            filename = entry.get("file")
+            if not filename:
+                continue
+            report["letters"] += 1
+            if entry.get("archive"):
+                archive = LetterArchive.for_path(penpal_dir / entry["archive"])
+                member = filename if archive.path.parent == penpal_dir else f"{penpal_dir.name}/{filename}"
+                if member not in archive:
+                    bad.append((_Letter(manifest, number, entry, archive.path, archive=archive, member=member), "missing"))
+                    continue
+                stored = archive.members[member]
+                letter = _Letter(manifest, number, entry, archive.path, stored["offset"], stored["size"], archive, member)
+                if "size" in entry and entry["size"] != stored["size"]:
+                    bad.append((letter, "size"))
+                elif full or "sha256" not in entry:
+                    to_hash.append(letter)
+                else:
+                    report["unchanged"] += 1
+                continue
+
+            path = penpal_dir / filename
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                if remote:
+                    report["remote"] += 1
+                else:
+                    bad.append((_Letter(manifest, number, entry, path), "missing"))
+                continue
+            letter = _Letter(manifest, number, entry, path, 0, stat.st_size)
+            if "size" in entry and entry["size"] != stat.st_size:
+                bad.append((letter, "size"))
+            elif not full and "sha256" in entry and entry.get("mtime") == stat.st_mtime:
+                report["unchanged"] += 1
+            else:
+                to_hash.append(letter)
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {
+            pool.submit(_hash_job, str(letter.path), letter.offset, letter.size, "sha256" not in letter.entry): letter
+            for letter in to_hash
+        }
+        for future in as_completed(futures):
+            letter = futures[future]
+            done += 1
+            report["hashed"] += 1
+            if progress_callback:
+                progress_callback(done, len(to_hash))
+            try:
+                sha, complete = future.result()
+            except Exception as e:
+                bad.append((letter, f"unreadable: {e}"))
+                continue
+
+            if "sha256" not in letter.entry:
+                if not complete:
+                    bad.append((letter, "truncated"))
+                    continue
+                if letter.number is None:
+                    # Complete, but with no letter number it can't be recorded
+                    continue
+                report["adopted"] += 1
+                letter.entry.update(sha256=sha, size=letter.size)
+            elif sha != letter.entry["sha256"]:
+                bad.append((letter, "checksum"))
+                continue
+            if not letter.archive:
+                # Same content, new mtime (copied or restored): trust it next time
+                letter.entry["mtime"] = letter.path.stat().st_mtime
+
+    for letter, reason in bad:
+        number = int(letter.number) if letter.number is not None else None
+        report["failed"].append({"file": letter.describe(), "letter": number, "reason": reason})
+        if requeue:
+            _requeue(letter)
+    for manifest in manifests:
+        manifest.save()
+
+    try:
+        with open(root / "verify_report.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    except Exception as e:
+        print(f"Error writing verify report: {e}")
+    return report
+
+
+def update_checksums(paths: Iterable[Path]):
+    """Re-records checksums for letters that were rewritten in place (e.g. by optimize)."""
+    by_dir: Dict[Path, List[Path]] = {}
+    for path in paths:
+        by_dir.setdefault(Path(path).parent, []).append(Path(path))
+    for penpal_dir, files in by_dir.items():
+        if not (penpal_dir / PenpalManifest.FILENAME).exists():
+            continue
+        manifest = PenpalManifest(penpal_dir)
+        numbers = {entry.get("file"): number for number, entry in manifest.letters.items()}
+        for path in files:
+            number = numbers.get(path.name)
+            if number is not None:
+                manifest.letters[number].update(checksum_fields(path))
+        manifest.save()
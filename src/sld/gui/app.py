@@ -2,10 +2,17 @@ import customtkinter as ctk
 import threading
 import asyncio
 import queue
-from typing import Dict
+import time
 from ..core.browser import BrowserEngine
 from ..core.downloader import LetterDownloader
+from ..core.metrics import metrics, exporter
+from ..core.pdf_optimize import optimize_tree
+from ..core.progress import ProgressReporter
+from ..core.scheduler import RunLock
+from ..core.tracing import tracer
 from ..config import config
+from .friend_list import FriendList
+from .log_view import LogView
 
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
@@ -32,6 +39,8 @@ class AsyncWorker(threading.Thread):
         self.join()
 
 class App(ctk.CTk):
+    MAX_MESSAGES_PER_FRAME = 50
+    
     def __init__(self):
         super().__init__()
         self.title("Slowly Letter Downloader (Modern)")
@@ -39,10 +48,12 @@ class App(ctk.CTk):
         
         # Communication queue
         self.msg_queue = queue.Queue()
+        self.progress = ProgressReporter()
+        self.frame_ms = config.get("ui_frame_ms")
         self.worker = AsyncWorker(self.msg_queue)
         self.worker.start()
-        
-        self.penpal_vars: Dict[str, ctk.IntVar] = {}
+        # Held from the first browser action until the window closes, since the browser stays open on the profile
+        self.lock = RunLock.default()
         
         self._setup_ui()
         self._check_queue()
@@ -70,29 +81,45 @@ class App(ctk.CTk):
         self.btn_download = ctk.CTkButton(self.left_panel, text="3. Download Selected", command=self.action_download, fg_color="green")
         self.btn_download.pack(pady=20, padx=10, fill="x")
 
-        # Scrollable Friend List
-        self.scroll_friends = ctk.CTkScrollableFrame(self.left_panel, label_text="Friends")
-        self.scroll_friends.pack(expand=True, fill="both", padx=5, pady=5)
+        # Friend List (virtualized: only visible rows have widgets)
+        self.friend_list = FriendList(self.left_panel)
+        self.friend_list.pack(expand=True, fill="both", padx=5, pady=5)
         
         # Right Panel (Logs)
         self.right_panel = ctk.CTkFrame(self)
         self.right_panel.grid(row=0, column=1, sticky="nswe", padx=10, pady=10)
         
+        # Progress
+        self.lbl_status = ctk.CTkLabel(self.right_panel, text="Idle", anchor="w")
+        self.lbl_status.pack(fill="x", padx=10, pady=(5, 0))
+        
+        self.lbl_penpal_progress = ctk.CTkLabel(self.right_panel, text="", anchor="w")
+        self.lbl_penpal_progress.pack(fill="x", padx=10)
+        self.bar_penpal = ctk.CTkProgressBar(self.right_panel)
+        self.bar_penpal.set(0)
+        self.bar_penpal.pack(fill="x", padx=10, pady=(0, 5))
+        
+        self.lbl_overall_progress = ctk.CTkLabel(self.right_panel, text="", anchor="w")
+        self.lbl_overall_progress.pack(fill="x", padx=10)
+        self.bar_overall = ctk.CTkProgressBar(self.right_panel)
+        self.bar_overall.set(0)
+        self.bar_overall.pack(fill="x", padx=10, pady=(0, 5))
+        
         self.lbl_log = ctk.CTkLabel(self.right_panel, text="Logs", font=("Arial", 16))
         self.lbl_log.pack(anchor="w", padx=10, pady=5)
         
-        self.txt_log = ctk.CTkTextbox(self.right_panel)
+        self.txt_log = LogView(self.right_panel, max_lines=config.get("log_max_lines"))
         self.txt_log.pack(expand=True, fill="both", padx=5, pady=5)
         
         self.log_message("Welcome! Please click 'Login' to start.")
         
     def log_message(self, msg: str):
-        self.txt_log.insert("end", f"{msg}\n")
-        self.txt_log.see("end")
+        self.txt_log.append(msg)
 
     def _check_queue(self):
+        """Runs once per UI frame: a bounded number of queued messages plus one progress update."""
         try:
-            while True:
+            for _ in range(self.MAX_MESSAGES_PER_FRAME):
                 msg_type, content = self.msg_queue.get_nowait()
                 if msg_type == "log":
                     self.log_message(content)
@@ -101,29 +128,57 @@ class App(ctk.CTk):
         except queue.Empty:
             pass
         finally:
-            self.after(100, self._check_queue)
+            self._render_progress()
+            self.after(self.frame_ms, self._check_queue)
+            
+    def _render_progress(self):
+        snapshot = self.progress.snapshot()
+        if snapshot is None:
+            return
+            
+        for line in snapshot.summaries:
+            self.log_message(line)
+        if snapshot.status:
+            self.lbl_status.configure(text=snapshot.status)
+            
+        current = next((p for p in snapshot.penpals if p.name == snapshot.current), None)
+        if current and current.total:
+            self.bar_penpal.set(current.done / current.total)
+            self.lbl_penpal_progress.configure(
+                text=f"{current.name}: {current.done}/{current.total} "
+                     f"({current.downloaded} new, {current.skipped} skipped, {current.failed} failed)"
+            )
+            
+        finished = sum(1 for p in snapshot.penpals if p.finished)
+        if snapshot.penpals:
+            # Totals are only known once a penpal's list is loaded, so weight by penpals finished
+            partial = current.done / current.total if current and current.total and not current.finished else 0
+            self.bar_overall.set((finished + partial) / len(snapshot.penpals))
+            self.lbl_overall_progress.configure(
+                text=f"Pen pals: {finished}/{len(snapshot.penpals)}, letters: {snapshot.done}"
+            )
             
     def populate_friends(self, friends: dict):
-        # Clear existing
-        for widget in self.scroll_friends.winfo_children():
-            widget.destroy()
-        self.penpal_vars.clear()
+        self.friend_list.set_friends(friends)
         
         if not friends:
             self.log_message("No friends found. did you scroll down in the browser?")
             return
-
-        for name in friends:
-            var = ctk.IntVar(value=1)
-            cb = ctk.CTkCheckBox(self.scroll_friends, text=name, variable=var)
-            cb.pack(anchor="w", pady=2)
-            self.penpal_vars[name] = var
             
         self.log_message(f"Found {len(friends)} friends.")
 
     # --- Actions ---
     
+    def _hold_lock(self) -> bool:
+        """Takes the run lock (kept until the window closes); False if a sync or CLI run has it."""
+        if self.lock.held or self.lock.acquire():
+            return True
+        self.log_message("A scheduled sync or CLI backup is running; try again when it has finished.")
+        return False
+
     def action_login(self):
+        if not self._hold_lock():
+            return
         self.log_message("Launching browser for login...")
         self.worker.submit(self._async_login())
         
@@ -133,6 +188,8 @@ class App(ctk.CTk):
         # Wait for login sync? optional.
 
     def action_scan(self):
+        if not self._hold_lock():
+            return
         self.log_message("Scanning for friends...")
         self.worker.submit(self._async_scan())
         
@@ -144,28 +201,77 @@ class App(ctk.CTk):
             self.msg_queue.put(("log", f"Error scanning: {e}"))
 
     def action_download(self):
-        selected = [name for name, var in self.penpal_vars.items() if var.get() == 1]
+        selected = self.friend_list.selected_names()
         if not selected:
             self.log_message("No friends selected!")
             return
-            
+
+        if not self._hold_lock():
+            return
         self.log_message(f"Starting download for: {', '.join(selected)}")
         self.worker.submit(self._async_download(selected))
         
     async def _async_download(self, names):
-        for name in names:
-            self.msg_queue.put(("log", f"Downloading letters for {name}..."))
-            try:
-                await self.worker.downloader.process_penpal(
-                    name, 
-                    progress_callback=lambda m: self.msg_queue.put(("log", m))
-                )
-            except Exception as e:
-                self.msg_queue.put(("log", f"Error downloading {name}: {e}"))
-        self.msg_queue.put(("log", "All downloads finished."))
+        if config.get("trace_enabled"):
+            tracer.enable()
+        if config.get("metrics_enabled"):
+            exporter.start()
+        metrics.run_in_progress.set(1)
+        try:
+            self.worker.downloader.begin_run()
+            self.progress.begin_run(names)
+            for name in names:
+                try:
+                    await self.worker.downloader.process_penpal(name, progress=self.progress)
+                    metrics.penpals_completed.inc()
+                except Exception as e:
+                    metrics.penpals_failed.inc()
+                    self.progress.add_summary(f"Error downloading {name}: {e}")
+            
+            await self.worker.downloader.retry_failed(self.progress)
+            self.progress.set_status("All downloads finished.")
+            self.progress.add_summary("All downloads finished.")
+            
+            if config.get("optimize_pdfs"):
+                await self._async_optimize()
+        except Exception as e:
+            self.progress.set_status("Download run failed.")
+            self.progress.add_summary(f"Download run failed: {e}")
+        finally:
+            # Runs even when the download fails, so the exporter stops and the trace is kept
+            metrics.run_in_progress.set(0)
+            metrics.last_run_timestamp.set(time.time())
+            if config.get("metrics_enabled"):
+                exporter.stop()
+
+            if tracer.enabled:
+                tracer.disable()
+                trace_path = tracer.export()
+                if trace_path:
+                    self.msg_queue.put(("log", f"Trace written to {trace_path}"))
+
+    async def _async_optimize(self):
+        """Recompresses images in the PDFs this run wrote, using all cores."""
+        # Files handed to remote storage may be gone locally
+        files = [path for path in self.worker.downloader.written if path.exists()]
+        if not files:
+            return
+        self.progress.set_status("Optimizing PDFs...")
+        loop = asyncio.get_running_loop()
+        report = await loop.run_in_executor(
+            None,
+            lambda: optimize_tree(files, config.get("optimize_dpi"), config.get("optimize_quality")),
+        )
+        saved_mb = report["bytes_saved"] / (1024 * 1024)
+        self.progress.set_status("Optimization finished.")
+        self.progress.add_summary(
+            f"Optimized {report['optimized']} of {report['files']} PDFs, saved {saved_mb:.1f} MB."
+        )
 
     def on_closing(self):
+        # The browser is closed by now, so a sync may use the profile
         self.worker.stop()
+        self.lock.release()
         self.destroy()
 
 if __name__ == "__main__":
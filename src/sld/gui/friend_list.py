@@ -0,0 +1,203 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Set
+
+import customtkinter as ctk
+
+
+class FriendIndex:
+    """
+    Search index over friend names.
+    Prefix lookups use a sorted key list (bisect); substring lookups intersect
+    trigram postings before confirming, so filtering stays cheap on large lists.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names = list(names)
+        self._folded = [name.casefold() for name in self.names]
+        self._sorted_ids = sorted(range(len(self.names)), key=lambda i: self._folded[i])
+        self._sorted_keys = [self._folded[i] for i in self._sorted_ids]
+        self._trigrams: Dict[str, Set[int]] = {}
+        for i, key in enumerate(self._folded):
+            for j in range(len(key) - 2):
+                self._trigrams.setdefault(key[j:j + 3], set()).add(i)
+
+    def search(self, query: str) -> List[int]:
+        """Returns matching ids: prefix matches first, then other substring matches."""
+        query = query.casefold().strip()
+        if not query:
+            return list(range(len(self.names)))
+
+        lo = bisect_left(self._sorted_keys, query)
+        hi = bisect_left(self._sorted_keys, query + "\U0010ffff")
+        prefix = sorted(self._sorted_ids[lo:hi])
+
+        if len(query) >= 3:
+            postings = [self._trigrams.get(query[j:j + 3], set()) for j in range(len(query) - 2)]
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            candidates = range(len(self.names))
+
+        seen = set(prefix)
+        rest = [i for i in sorted(candidates) if i not in seen and query in self._folded[i]]
+        return prefix + rest
+
+
+class FriendList(ctk.CTkFrame):
+    """
+    Virtualized, filterable checkbox list.
+    Only enough checkbox widgets for the visible rows are created; scrolling
+    and filtering re-bind those rows to different names. Selection lives in a
+    plain set, so bulk select/deselect never touches hidden rows.
+    """
+    ROW_HEIGHT = 28
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.index = FriendIndex([])
+        self.view: List[int] = []
+        self.selected: Set[str] = set()
+        self.offset = 0
+        self._rows: List[ctk.CTkCheckBox] = []
+        self._filter_job = None
+
+        self.lbl_title = ctk.CTkLabel(self, text="Friends")
+        self.lbl_title.pack(fill="x", padx=5, pady=(5, 0))
+
+        self.filter_var = ctk.StringVar()
+        self.filter_var.trace_add("write", lambda *_: self._schedule_filter())
+        self.entry_filter = ctk.CTkEntry(self, placeholder_text="Filter...", textvariable=self.filter_var)
+        self.entry_filter.pack(fill="x", padx=5, pady=5)
+
+        buttons = ctk.CTkFrame(self, fg_color="transparent")
+        buttons.pack(fill="x", padx=5)
+        self.btn_select_all = ctk.CTkButton(buttons, text="Select all", width=80, command=self.select_all)
+        self.btn_select_all.pack(side="left", expand=True, fill="x", padx=(0, 2))
+        self.btn_deselect_all = ctk.CTkButton(buttons, text="Deselect all", width=80, command=self.deselect_all)
+        self.btn_deselect_all.pack(side="left", expand=True, fill="x", padx=(2, 0))
+
+        body = ctk.CTkFrame(self)
+        body.pack(expand=True, fill="both", padx=5, pady=5)
+        self.scrollbar = ctk.CTkScrollbar(body, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.rows_frame = ctk.CTkFrame(body, fg_color="transparent")
+        self.rows_frame.pack(side="left", expand=True, fill="both")
+        self.rows_frame.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self.rows_frame)
+
+        self.lbl_count = ctk.CTkLabel(self, text="")
+        self.lbl_count.pack(fill="x", padx=5, pady=(0, 5))
+
+    # --- Data ---
+
+    def set_friends(self, names: Iterable[str], selected: bool = True):
+        self.index = FriendIndex(names)
+        self.selected = set(self.index.names) if selected else set()
+        self._apply_filter()
+
+    def selected_names(self) -> List[str]:
+        """Selected names in list order."""
+        return [name for name in self.index.names if name in self.selected]
+
+    def select_all(self):
+        self.selected.update(self.index.names[i] for i in self.view)
+        self._render()
+
+    def deselect_all(self):
+        self.selected.difference_update(self.index.names[i] for i in self.view)
+        self._render()
+
+    # --- Filtering ---
+
+    def _schedule_filter(self):
+        # Debounce so typing a word filters once, not once per keystroke
+        if self._filter_job:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(120, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_job = None
+        self.view = self.index.search(self.filter_var.get())
+        self.offset = 0
+        self._render()
+
+    # --- Virtual rows ---
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self.rows_frame.winfo_height() // self.ROW_HEIGHT)
+
+    def _on_resize(self, _event=None):
+        while len(self._rows) < self.capacity:
+            k = len(self._rows)
+            row = ctk.CTkCheckBox(self.rows_frame, text="", height=self.ROW_HEIGHT,
+                                  command=lambda k=k: self._toggle_row(k))
+            self._bind_wheel(row)
+            self._rows.append(row)
+        self._render()
+
+    def _toggle_row(self, k: int):
+        position = self.offset + k
+        if position >= len(self.view):
+            return
+        name = self.index.names[self.view[position]]
+        if self._rows[k].get():
+            self.selected.add(name)
+        else:
+            self.selected.discard(name)
+        self._update_count()
+
+    def _render(self):
+        visible = min(self.capacity, len(self._rows))
+        self.offset = max(0, min(self.offset, len(self.view) - visible))
+
+        for k, row in enumerate(self._rows):
+            position = self.offset + k
+            if k < visible and position < len(self.view):
+                name = self.index.names[self.view[position]]
+                row.configure(text=name)
+                if name in self.selected:
+                    row.select()
+                else:
+                    row.deselect()
+                row.place(x=0, y=k * self.ROW_HEIGHT, relwidth=1.0)
+            else:
+                row.place_forget()
+
+        if self.view:
+            self.scrollbar.set(self.offset / len(self.view), min(1.0, (self.offset + visible) / len(self.view)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self._update_count()
+
+    def _update_count(self):
+        self.lbl_count.configure(
+            text=f"{len(self.selected)} of {len(self.index.names)} selected ({len(self.view)} shown)"
+        )
+
+    # --- Scrolling ---
+
+    def _scroll_to(self, offset: int):
+        self.offset = offset
+        self._render()
+
+    def _on_scrollbar(self, action: str, amount: str, unit: str = "units"):
+        if action == "moveto":
+            self._scroll_to(int(float(amount) * len(self.view)))
+        elif action == "scroll":
+            step = self.capacity if unit == "pages" else 1
+            self._scroll_to(self.offset + int(amount) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4:
+            delta = -1
+        elif getattr(event, "num", None) == 5:
+            delta = 1
+        else:
+            delta = -1 if event.delta > 0 else 1
+        self._scroll_to(self.offset + delta * 3)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel, add="+")
+        widget.bind("<Button-4>", self._on_wheel, add="+")
+        widget.bind("<Button-5>", self._on_wheel, add="+")
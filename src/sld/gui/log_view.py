@@ -0,0 +1,73 @@
+import logging
+import logging.handlers
+from pathlib import Path
+from typing import List, Optional
+
+import customtkinter as ctk
+
+from ..config import config
+
+
+def _file_logger(path: Path) -> logging.Logger:
+    """Rotating file logger that receives every GUI log line."""
+    logger = logging.getLogger("sld.gui.log")
+    if not logger.handlers:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class LogView(ctk.CTkTextbox):
+    """
+    Log textbox with constant cost per message.
+    Keeps the last `max_lines` lines on screen, batches
+    inserts into one Tk update per idle cycle, and spills the full log to a
+    rotating file so nothing is lost when old lines are dropped.
+    """
+
+    def __init__(self, master, max_lines: int = 1000, log_file: Optional[Path] = None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.max_lines = max_lines
+        self._pending: List[str] = []
+        self._flush_scheduled = False
+        self._file_log = _file_logger(log_file or config.user_data_dir / "logs" / "sld.log")
+        self.log_file = Path(self._file_log.handlers[0].baseFilename)
+        self.configure(state="disabled")
+
+    def append(self, msg: str):
+        self._file_log.info(msg)
+        self._pending.append(msg)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.after_idle(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        # Anything beyond the cap would be trimmed straight away, so skip inserting it
+        pending = self._pending[-self.max_lines:]
+        self._pending.clear()
+        if not pending:
+            return
+
+        self.configure(state="normal")
+        self.insert("end", "\n".join(pending) + "\n")
+
+        # Count real textbox lines: one message (e.g. a traceback) may span many
+        visible = int(self.index("end-1c").split(".")[0]) - 1
+        overflow = visible - self.max_lines
+        if overflow > 0:
+            self.delete("1.0", f"{overflow + 1}.0")
+        self.configure(state="disabled")
+        self.see("end")
+
+    def clear(self):
+        self._pending.clear()
+        self.configure(state="normal")
+        self.delete("1.0", "end")
+        self.configure(state="disabled")